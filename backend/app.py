@@ -13,8 +13,11 @@ from fastapi import FastAPI, Query, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.concurrency import run_in_threadpool
 import uvicorn
 import traceback
+from contextlib import asynccontextmanager
+import numpy as np
 from typing import List, Dict, Any, Optional
 
 # 添加项目根目录到Python路径
@@ -22,19 +25,28 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 # 导入服务模块
 from services.biorhythm_service import (
-    get_history, get_today_biorhythm, get_date_biorhythm, get_biorhythm_range
+    get_history, get_today_biorhythm, get_date_biorhythm, get_biorhythm_range,
+    get_biorhythm_range_arrays, iter_biorhythm_range, get_biorhythm_batch, calculate_biorhythm_batch,
+    find_critical_days, calculate_compatibility, calculate_compatibility_matrix, find_top_compatible,
+    parse_date_array, CYCLES, MAX_COMPATIBILITY_MATRIX_SIZE
 )
+from services.biorhythm_life_guide_service import get_biorhythm_life_guide, get_biorhythm_guide_range
 from services.dress_service import (
-    get_today_dress_info, get_date_dress_info, get_dress_info_range
+    get_today_dress_info, get_date_dress_info, get_dress_info_range, get_dress_calendar
 )
 from services.maya_service import (
-    get_today_maya_info, get_date_maya_info, get_maya_info_range,
-    get_maya_birth_info, get_maya_history
+    get_today_maya_info, get_date_maya_info, get_maya_info_range, iter_maya_info_range,
+    get_maya_occurrences, get_next_maya_occurrences, get_maya_energy_range, ENERGY_CATEGORY_CODES,
+    get_maya_oracle, get_maya_oracle_batch, calculate_kin_number, calculate_maya_group_compatibility,
+    get_maya_birth_info, get_maya_history, update_maya_history
 )
 from services.api_docs_service import api_docs_service
-from utils.date_utils import normalize_date_string
+from utils.date_utils import normalize_date_string, get_date_range
 from utils.cache_manager import cache_manager, cached
 from utils.rate_limiter import rate_limit, rate_limiter
+from utils.history_store import DEFAULT_CLIENT_ID
+from utils.streaming import wants_ndjson, ndjson_response
+from utils.columnar_formats import negotiate_format, is_format_available, columnar_response
 
 class UnifiedBackendService:
     """统一后端服务类"""
@@ -47,10 +59,21 @@ class UnifiedBackendService:
             version="1.0.0",
             docs_url="/api/docs",
             redoc_url="/api/redoc",
-            openapi_url="/api/openapi.json"
+            openapi_url="/api/openapi.json",
+            lifespan=self.lifespan
         )
         self.setup_middleware()
         self.setup_routes()
+    
+    @asynccontextmanager
+    async def lifespan(self, app: FastAPI):
+        """服务启动时预热：加载（必要时编译）穿衣日历并建立内存映射，避免首个请求承担该开销"""
+        try:
+            get_dress_calendar()
+            self.logger.info("穿衣日历已加载")
+        except Exception as e:
+            self.logger.warning(f"穿衣日历预加载失败，将在首次请求时重试: {str(e)}")
+        yield
         
     def setup_logging(self):
         """配置优化的日志系统"""
@@ -233,11 +256,26 @@ class UnifiedBackendService:
                         "今日节律": "/biorhythm/today?birth_date=YYYY-MM-DD",
                         "指定日期节律": "/biorhythm/date?birth_date=YYYY-MM-DD&date=YYYY-MM-DD",
                         "日期范围节律": "/biorhythm/range?birth_date=YYYY-MM-DD&days_before=10&days_after=20",
+                        "日期范围节律（流式）": "/biorhythm/range?birth_date=YYYY-MM-DD&days_after=3650&stream=true",
+                        "日期范围节律（二进制）": "/biorhythm/range?birth_date=YYYY-MM-DD&format=arrow|npy|msgpack",
+                        "批量节律": "/biorhythm/batch (POST)",
+                        "临界日": "/biorhythm/critical-days?birth_date=YYYY-MM-DD&count=5",
+                        "生活指南": "/biorhythm/guide?birth_date=YYYY-MM-DD",
+                        "日期范围生活建议": "/biorhythm/guide/range?birth_date=YYYY-MM-DD&days_before=0&days_after=29",
+                        "节律兼容度": "/biorhythm/compatibility?birth_date_a=YYYY-MM-DD&birth_date_b=YYYY-MM-DD",
+                        "群体兼容度": "/biorhythm/compatibility/matrix (POST)",
                         "历史记录": "/biorhythm/history"
                     },
                     "玛雅历法": {
-                        "今日玛雅信息": "/maya/today",
+                        "今日玛雅信息": "/maya/today?fields=maya_kin,maya_seal",
                         "指定日期玛雅信息": "/maya/date?date=YYYY-MM-DD",
+                        "玛雅日期范围": "/maya/range?start_date=YYYY-MM-DD&end_date=YYYY-MM-DD&stream=false",
+                        "玛雅能量热力图": "/maya/energy?start_date=YYYY-MM-DD&end_date=YYYY-MM-DD&format=json",
+                        "按条件查询玛雅日期": "/maya/occurrences?start_date=YYYY-MM-DD&end_date=YYYY-MM-DD&seal=蓝夜",
+                        "下一个银河生日": "/maya/next?birth_date=YYYY-MM-DD",
+                        "玛雅神谕": "/maya/oracle?kin=1",
+                        "批量玛雅神谕": "/api/maya/oracle/batch (POST)",
+                        "玛雅群体关系": "/api/maya/group-compatibility (POST)",
                         "玛雅出生图": "/api/maya/birth-info (POST)",
                         "玛雅历史": "/api/maya/history"
                     },
@@ -256,12 +294,51 @@ class UnifiedBackendService:
             
         # ==================== 生物节律相关接口 ====================
         
+        def get_client_id(request: Request) -> str:
+            """
+            获取客户端标识：优先使用X-Client-Id请求头，否则使用客户端IP
+            
+            注意：该标识未经认证，只用于区分历史记录，不是访问控制。
+            任何人发送相同的X-Client-Id即可读取该标识下的历史记录，
+            因此历史记录中不应保存敏感信息；需要隔离时应在前置网关完成认证并注入该请求头
+            """
+            client_id = request.headers.get("x-client-id")
+            if client_id:
+                return client_id[:128]
+            return request.client.host if request.client else DEFAULT_CLIENT_ID
+        
+        def parse_birth_dates_body(data) -> List[str]:
+            """
+            校验JSON请求体中的birth_dates并标准化
+            
+            Raises:
+                ValueError: 请求体不是JSON对象，或birth_dates缺失、不是日期字符串列表
+            """
+            if not isinstance(data, dict):
+                raise ValueError("请求体必须是JSON对象")
+            birth_dates = data.get('birth_dates')
+            if not birth_dates:
+                raise ValueError("缺少birth_dates参数")
+            if not isinstance(birth_dates, list) or not all(isinstance(d, str) for d in birth_dates):
+                raise ValueError("birth_dates必须是日期字符串列表")
+            return [normalize_date_string(d) for d in birth_dates]
+        
+        def resolve_columnar_format(request: Request, format_param: Optional[str]) -> str:
+            """确定数值序列接口的响应格式，不支持或不可用时返回4xx"""
+            try:
+                fmt = negotiate_format(request, format_param)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            if not is_format_available(fmt):
+                raise HTTPException(status_code=406, detail=f"服务器未安装{fmt}格式所需的依赖")
+            return fmt
+        
         @self.app.get("/biorhythm/history")
-        async def api_get_biorhythm_history():
-            """获取生物节律历史查询记录"""
+        def api_get_biorhythm_history(request: Request):
+            """获取生物节律历史查询记录（同步路由，SQLite读取在线程池中执行，不阻塞事件循环）"""
             self.logger.info("获取生物节律历史记录")
             try:
-                history = get_history()
+                history = get_history(get_client_id(request))
                 self.logger.info(f"返回{len(history)}条历史记录")
                 return {"history": history}
             except Exception as e:
@@ -270,7 +347,10 @@ class UnifiedBackendService:
 
         @self.app.get("/biorhythm/today")
         @rate_limit(max_requests=60, window_size=60)  # 每分钟最多60次请求
-        async def api_get_today_biorhythm(birth_date: str = Query(..., description="出生日期，格式为YYYY-MM-DD")):
+        async def api_get_today_biorhythm(
+            request: Request,
+            birth_date: str = Query(..., description="出生日期，格式为YYYY-MM-DD")
+        ):
             """获取今天的生物节律"""
             self.logger.info(f"计算今日生物节律 | 生日: {birth_date}")
             try:
@@ -285,7 +365,7 @@ class UnifiedBackendService:
                     self.logger.info("从缓存获取今日生物节律")
                     return cached_result
                 
-                result = get_today_biorhythm(birth_date)
+                result = get_today_biorhythm(birth_date, get_client_id(request))
                 
                 # 缓存结果（5分钟TTL）
                 cache_manager.set(cache_key, result, 300)
@@ -299,6 +379,7 @@ class UnifiedBackendService:
         @self.app.get("/biorhythm/date")
         @rate_limit(max_requests=60, window_size=60)
         async def api_get_date_biorhythm(
+            request: Request,
             birth_date: str = Query(..., description="出生日期，格式为YYYY-MM-DD"),
             date: str = Query(..., description="目标日期，格式为YYYY-MM-DD")
         ):
@@ -317,7 +398,7 @@ class UnifiedBackendService:
                     self.logger.info("从缓存获取指定日期生物节律")
                     return cached_result
                 
-                result = get_date_biorhythm(birth_date, date)
+                result = get_date_biorhythm(birth_date, date, get_client_id(request))
                 
                 # 缓存结果（10分钟TTL）
                 cache_manager.set(cache_key, result, 600)
@@ -330,63 +411,442 @@ class UnifiedBackendService:
 
         @self.app.get("/biorhythm/range")
         async def api_get_biorhythm_range(
+            request: Request,
             birth_date: str = Query(..., description="出生日期，格式为YYYY-MM-DD"),
             days_before: int = Query(10, description="当前日期之前的天数"),
-            days_after: int = Query(20, description="当前日期之后的天数")
+            days_after: int = Query(20, description="当前日期之后的天数"),
+            stream: bool = Query(False, description="是否以NDJSON流式返回（也可使用Accept: application/x-ndjson）"),
+            format: Optional[str] = Query(None, description="响应格式：json、arrow、npy或msgpack（也可使用Accept头）")
         ):
             """获取一段时间内的生物节律"""
             self.logger.info(f"计算生物节律范围 | 生日: {birth_date} | 前{days_before}天 | 后{days_after}天")
+            fmt = resolve_columnar_format(request, format)
             try:
                 birth_date = normalize_date_string(birth_date)
-                result = get_biorhythm_range(birth_date, days_before, days_after)
+                if wants_ndjson(request, stream):
+                    self.logger.info("生物节律范围以NDJSON流式返回")
+                    return ndjson_response(iter_biorhythm_range(
+                        birth_date, days_before, days_after, get_client_id(request)
+                    ))
+                if fmt != "json":
+                    window = get_biorhythm_range_arrays(birth_date, days_before, days_after, get_client_id(request))
+                    columns = {"date": window["dates"]}
+                    # 节律值范围为[-100, 100]，二进制格式使用int8
+                    columns.update({name: window[name].astype(np.int8) for name in CYCLES})
+                    self.logger.info(f"生物节律范围计算成功 | 共{len(window['dates'])}天数据 | 格式: {fmt}")
+                    return columnar_response(columns, fmt, {"birth_date": birth_date})
+                result = get_biorhythm_range(birth_date, days_before, days_after, get_client_id(request))
                 self.logger.info(f"生物节律范围计算成功 | 共{len(result.get('biorhythm_list', []))}天数据")
                 return result
             except Exception as e:
                 self.logger.error(f"生物节律范围计算失败: {str(e)}")
                 raise HTTPException(status_code=500, detail=str(e))
                 
+        @self.app.post("/biorhythm/batch")
+        async def api_get_biorhythm_batch(request: Request):
+            """批量计算多个出生日期在同一日期窗口内的生物节律"""
+            try:
+                data = await request.json()
+                birth_dates = parse_birth_dates_body(data)
+                if data.get('start_date') and data.get('end_date'):
+                    start_date = normalize_date_string(data['start_date'])
+                    end_date = normalize_date_string(data['end_date'])
+                else:
+                    start_date, end_date = get_date_range(
+                        datetime.now().date(),
+                        int(data.get('days_before', 10)),
+                        int(data.get('days_after', 20))
+                    )
+            except (ValueError, TypeError) as e:
+                self.logger.warning(f"批量生物节律请求无效: {str(e)}")
+                raise HTTPException(status_code=400, detail=str(e))
+            
+            self.logger.info(f"批量计算生物节律 | 人数: {len(birth_dates)} | 范围: {start_date} ~ {end_date}")
+            fmt = resolve_columnar_format(request, data.get('format'))
+            
+            try:
+                if fmt != "json":
+                    batch = calculate_biorhythm_batch(birth_dates, start_date, end_date)
+                    columns = {"birth_date": batch["birth_dates"]}
+                    columns.update({name: batch[name].astype(np.int8) for name in CYCLES})
+                    self.logger.info(f"批量生物节律计算成功 | 格式: {fmt}")
+                    return columnar_response(columns, fmt, {"start_date": str(start_date), "end_date": str(end_date)})
+                result = get_biorhythm_batch(birth_dates, start_date, end_date)
+            except ValueError as e:
+                self.logger.warning(f"批量生物节律参数无效: {str(e)}")
+                raise HTTPException(status_code=400, detail=str(e))
+            except Exception as e:
+                self.logger.error(f"批量生物节律计算失败: {str(e)}")
+                raise HTTPException(status_code=500, detail=str(e))
+            
+            self.logger.info(f"批量生物节律计算成功 | 共{len(result['subjects'])}人 × {len(result['dates'])}天")
+            # 结果仅含基础类型，直接序列化，跳过逐元素的jsonable_encoder转换
+            return JSONResponse(content=result)
+                
+        @self.app.get("/biorhythm/critical-days")
+        async def api_get_critical_days(
+            birth_date: str = Query(..., description="出生日期，格式为YYYY-MM-DD"),
+            date: Optional[str] = Query(None, description="查询开始日期，默认为今天"),
+            count: int = Query(5, ge=0, le=1000, description="每种事件返回的数量"),
+            horizon_days: int = Query(3650, ge=0, le=36500, description="查询的天数范围"),
+            min_cycles: int = Query(2, ge=1, description="重合临界日的最少周期数")
+        ):
+            """获取后续的临界日、高峰日、低谷日以及多周期重合的临界日"""
+            self.logger.info(f"计算生物节律临界日 | 生日: {birth_date} | 开始日期: {date} | 范围: {horizon_days}天")
+            try:
+                birth_date = normalize_date_string(birth_date)
+                if date:
+                    date = normalize_date_string(date)
+                result = find_critical_days(birth_date, date, count, horizon_days, min_cycles)
+                self.logger.info(f"生物节律临界日计算成功 | 重合临界日{len(result['coincidences'])}个")
+                return result
+            except Exception as e:
+                self.logger.error(f"生物节律临界日计算失败: {str(e)}")
+                raise HTTPException(status_code=500, detail=str(e))
+                
+        @self.app.get("/biorhythm/guide")
+        async def api_get_biorhythm_guide(
+            birth_date: str = Query(..., description="出生日期，格式为YYYY-MM-DD"),
+            location: Optional[str] = Query(None, description="地理位置")
+        ):
+            """获取综合生物节律生活指南"""
+            self.logger.info(f"生成生物节律生活指南 | 生日: {birth_date} | 位置: {location}")
+            try:
+                result = get_biorhythm_life_guide(normalize_date_string(birth_date), location)
+            except Exception as e:
+                self.logger.error(f"生物节律生活指南生成失败: {str(e)}")
+                raise HTTPException(status_code=500, detail=str(e))
+            
+            if not result.get("success"):
+                self.logger.error(f"生物节律生活指南生成失败: {result.get('error')}")
+                raise HTTPException(status_code=400, detail=result.get("error"))
+            
+            self.logger.info("生物节律生活指南生成成功")
+            return result
+
+        @self.app.get("/biorhythm/guide/range")
+        async def api_get_biorhythm_guide_range(
+            birth_date: str = Query(..., description="出生日期，格式为YYYY-MM-DD"),
+            days_before: int = Query(0, description="当前日期之前的天数"),
+            days_after: int = Query(29, description="当前日期之后的天数")
+        ):
+            """获取一段时间内每天的生物节律生活建议"""
+            self.logger.info(f"生成生物节律生活建议范围 | 生日: {birth_date} | 前{days_before}天 | 后{days_after}天")
+            try:
+                result = get_biorhythm_guide_range(normalize_date_string(birth_date), days_before, days_after)
+                self.logger.info(f"生物节律生活建议范围生成成功 | 共{len(result['days'])}天数据")
+                return JSONResponse(content=result)
+            except Exception as e:
+                self.logger.error(f"生物节律生活建议范围生成失败: {str(e)}")
+                raise HTTPException(status_code=500, detail=str(e))
+
+        @self.app.get("/biorhythm/compatibility")
+        async def api_get_biorhythm_compatibility(
+            birth_date_a: str = Query(..., description="第一个人的出生日期，格式为YYYY-MM-DD"),
+            birth_date_b: str = Query(..., description="第二个人的出生日期，格式为YYYY-MM-DD")
+        ):
+            """计算两人的生物节律同步程度"""
+            self.logger.info(f"计算生物节律兼容度 | 生日: {birth_date_a} & {birth_date_b}")
+            try:
+                result = calculate_compatibility(
+                    normalize_date_string(birth_date_a), normalize_date_string(birth_date_b)
+                )
+                self.logger.info(f"生物节律兼容度计算成功 | 综合: {result['overall']}")
+                return result
+            except Exception as e:
+                self.logger.error(f"生物节律兼容度计算失败: {str(e)}")
+                raise HTTPException(status_code=500, detail=str(e))
+
+        @self.app.post("/biorhythm/compatibility/matrix")
+        async def api_get_biorhythm_compatibility_matrix(request: Request):
+            """计算群体内两两之间的生物节律同步程度，或每个人的top_k最佳伙伴"""
+            try:
+                data = await request.json()
+                birth_dates = parse_birth_dates_body(data)
+                top_k = data.get('top_k')
+                if top_k is not None:
+                    top_k = int(top_k)
+            except (ValueError, TypeError) as e:
+                self.logger.warning(f"群体兼容度请求无效: {str(e)}")
+                raise HTTPException(status_code=400, detail=str(e))
+            
+            if top_k is None and len(birth_dates) > MAX_COMPATIBILITY_MATRIX_SIZE:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"人数超过{MAX_COMPATIBILITY_MATRIX_SIZE}时请使用top_k参数"
+                )
+            self.logger.info(f"计算群体兼容度 | 人数: {len(birth_dates)} | top_k: {top_k}")
+            fmt = resolve_columnar_format(request, data.get('format'))
+            
+            try:
+                if fmt != "json":
+                    columns = {"birth_date": parse_date_array(birth_dates)}
+                    if top_k is None:
+                        columns["overall"] = calculate_compatibility_matrix(birth_dates).astype(np.int8)
+                    else:
+                        top = find_top_compatible(birth_dates, top_k)
+                        columns["indices"] = top["indices"].astype(np.int32)
+                        columns["scores"] = top["scores"].astype(np.int8)
+                    self.logger.info(f"群体兼容度计算成功 | 格式: {fmt}")
+                    return columnar_response(columns, fmt)
+                if top_k is None:
+                    matrix = calculate_compatibility_matrix(birth_dates)
+                    result = {"birth_dates": birth_dates, "matrix": matrix.tolist()}
+                else:
+                    top = find_top_compatible(birth_dates, top_k)
+                    result = {
+                        "birth_dates": birth_dates,
+                        "top_k": {
+                            "indices": top["indices"].tolist(),
+                            "scores": top["scores"].tolist()
+                        }
+                    }
+            except ValueError as e:
+                self.logger.warning(f"群体兼容度参数无效: {str(e)}")
+                raise HTTPException(status_code=400, detail=str(e))
+            except Exception as e:
+                self.logger.error(f"群体兼容度计算失败: {str(e)}")
+                raise HTTPException(status_code=500, detail=str(e))
+            
+            self.logger.info("群体兼容度计算成功")
+            return JSONResponse(content=result)
+                
         # ==================== 玛雅历法相关接口 ====================
         
         @self.app.get("/maya/today")
-        async def api_get_today_maya():
+        async def api_get_today_maya(
+            fields: Optional[str] = Query(None, description="只返回指定字段（逗号分隔），例如maya_kin,maya_seal")
+        ):
             """获取今日玛雅历法信息"""
-            self.logger.info("获取今日玛雅历法信息")
+            self.logger.info(f"获取今日玛雅历法信息 | 字段: {fields or '全部'}")
             try:
-                result = get_today_maya_info()
+                result = get_today_maya_info(fields)
                 self.logger.info("今日玛雅历法信息获取成功")
                 return result
+            except ValueError as e:
+                self.logger.warning(f"今日玛雅历法信息参数无效: {str(e)}")
+                raise HTTPException(status_code=400, detail=str(e))
             except Exception as e:
                 self.logger.error(f"今日玛雅历法信息获取失败: {str(e)}")
                 raise HTTPException(status_code=500, detail=str(e))
                 
         @self.app.get("/maya/date")
-        async def api_get_date_maya(date: str = Query(..., description="目标日期，格式为YYYY-MM-DD")):
+        async def api_get_date_maya(
+            date: str = Query(..., description="目标日期，格式为YYYY-MM-DD"),
+            fields: Optional[str] = Query(None, description="只返回指定字段（逗号分隔），例如maya_kin,maya_seal")
+        ):
             """获取指定日期的玛雅历法信息"""
-            self.logger.info(f"获取指定日期玛雅历法信息 | 日期: {date}")
+            self.logger.info(f"获取指定日期玛雅历法信息 | 日期: {date} | 字段: {fields or '全部'}")
             try:
                 date = normalize_date_string(date)
-                result = get_date_maya_info(date)
+                result = get_date_maya_info(date, fields)
                 self.logger.info("指定日期玛雅历法信息获取成功")
                 return result
+            except ValueError as e:
+                self.logger.warning(f"指定日期玛雅历法信息参数无效: {str(e)}")
+                raise HTTPException(status_code=400, detail=str(e))
             except Exception as e:
                 self.logger.error(f"指定日期玛雅历法信息获取失败: {str(e)}")
                 raise HTTPException(status_code=500, detail=str(e))
                 
         @self.app.get("/maya/range")
         async def api_get_maya_range(
+            request: Request,
             days_before: int = Query(3, description="当前日期之前的天数"),
-            days_after: int = Query(3, description="当前日期之后的天数")
+            days_after: int = Query(3, description="当前日期之后的天数"),
+            start_date: Optional[str] = Query(None, description="开始日期，格式为YYYY-MM-DD（与end_date同时提供时忽略days_before/days_after）"),
+            end_date: Optional[str] = Query(None, description="结束日期，格式为YYYY-MM-DD"),
+            stream: bool = Query(False, description="是否以NDJSON流式返回（也可使用Accept: application/x-ndjson）"),
+            fields: Optional[str] = Query(None, description="只返回指定字段（逗号分隔），date始终返回"),
+            compact: bool = Query(False, description="紧凑模式：重复的静态对象只在dictionary中出现一次，记录中为其下标（不适用于流式返回）")
         ):
-            """获取一段时间内的玛雅历法信息"""
-            self.logger.info(f"获取玛雅历法范围信息 | 前{days_before}天 | 后{days_after}天")
+            """获取一段时间内的玛雅历法信息，最长一个玛雅历轮回（18980天）"""
+            if start_date is not None:
+                start_date = normalize_date_string(start_date)
+            if end_date is not None:
+                end_date = normalize_date_string(end_date)
+            self.logger.info(
+                f"获取玛雅历法范围信息 | 前{days_before}天 | 后{days_after}天 | 开始: {start_date} | 结束: {end_date}"
+            )
             try:
-                result = get_maya_info_range(days_before, days_after)
+                if wants_ndjson(request, stream):
+                    self.logger.info("玛雅历法范围信息以NDJSON流式返回")
+                    return ndjson_response(iter_maya_info_range(
+                        start_date, end_date, days_before, days_after, fields=fields
+                    ))
+                result = get_maya_info_range(days_before, days_after, start_date, end_date, fields, compact)
                 self.logger.info(f"玛雅历法范围信息获取成功 | 共{len(result.get('maya_info_list', []))}天数据")
-                return result
+                return JSONResponse(content=result)
+            except ValueError as e:
+                self.logger.warning(f"玛雅历法范围参数无效: {str(e)}")
+                raise HTTPException(status_code=400, detail=str(e))
             except Exception as e:
                 self.logger.error(f"玛雅历法范围信息获取失败: {str(e)}")
                 raise HTTPException(status_code=500, detail=str(e))
                 
+        @self.app.get("/maya/energy")
+        async def api_get_maya_energy(
+            request: Request,
+            start_date: str = Query(..., description="开始日期，格式为YYYY-MM-DD"),
+            end_date: str = Query(..., description="结束日期，格式为YYYY-MM-DD"),
+            format: Optional[str] = Query(None, description="响应格式：json、arrow、npy或msgpack（也可使用Accept头）")
+        ):
+            """获取日期范围内每天的能量分数和趋势（能量热力图数据）"""
+            self.logger.info(f"获取玛雅能量分数 | 范围: {start_date} ~ {end_date}")
+            fmt = resolve_columnar_format(request, format)
+            try:
+                energy = get_maya_energy_range(normalize_date_string(start_date), normalize_date_string(end_date))
+            except ValueError as e:
+                self.logger.warning(f"玛雅能量分数参数无效: {str(e)}")
+                raise HTTPException(status_code=400, detail=str(e))
+            except Exception as e:
+                self.logger.error(f"玛雅能量分数计算失败: {str(e)}")
+                raise HTTPException(status_code=500, detail=str(e))
+            
+            self.logger.info(f"玛雅能量分数计算成功 | 共{len(energy['dates'])}天数据 | 格式: {fmt}")
+            if fmt != "json":
+                columns = {"date": energy["dates"], "kin": energy["kins"].astype(np.int16)}
+                # 分数范围为[50, 95]，二进制格式使用int8，列名使用ASCII类别代码
+                columns.update({
+                    ENERGY_CATEGORY_CODES[key]: scores.astype(np.int8) for key, scores in energy["scores"].items()
+                })
+                return columnar_response(columns, fmt, {"start_date": start_date, "end_date": end_date})
+            return JSONResponse(content={
+                "dates": np.datetime_as_string(energy["dates"], unit='D').tolist(),
+                "kins": energy["kins"].tolist(),
+                "energy_scores": {key: scores.tolist() for key, scores in energy["scores"].items()},
+                "trends": {
+                    key: np.where(variations > 0, "上升", "下降").tolist()
+                    for key, variations in energy["variations"].items()
+                }
+            })
+                
+        @self.app.get("/maya/occurrences")
+        async def api_get_maya_occurrences(
+            start_date: str = Query(..., description="开始日期，格式为YYYY-MM-DD"),
+            end_date: str = Query(..., description="结束日期，格式为YYYY-MM-DD"),
+            kin: Optional[int] = Query(None, description="KIN码（1-260）"),
+            seal: Optional[str] = Query(None, description="图腾名称或编号（1-20），例如蓝夜"),
+            tone: Optional[str] = Query(None, description="调性名称或编号（1-13），例如磁性"),
+            wavespell: Optional[int] = Query(None, description="波符编号（1-20）")
+        ):
+            """查询日期范围内满足条件的所有日期，多个条件同时满足"""
+            self.logger.info(
+                f"查询玛雅日期 | 范围: {start_date} ~ {end_date} | kin: {kin} | 图腾: {seal} | 调性: {tone} | 波符: {wavespell}"
+            )
+            try:
+                result = get_maya_occurrences(
+                    normalize_date_string(start_date), normalize_date_string(end_date),
+                    kin, seal, tone, wavespell
+                )
+                self.logger.info(f"玛雅日期查询成功 | 共{result['count']}个日期")
+                return JSONResponse(content=result)
+            except ValueError as e:
+                self.logger.warning(f"玛雅日期查询参数无效: {str(e)}")
+                raise HTTPException(status_code=400, detail=str(e))
+            except Exception as e:
+                self.logger.error(f"玛雅日期查询失败: {str(e)}")
+                raise HTTPException(status_code=500, detail=str(e))
+                
+        @self.app.get("/maya/next")
+        async def api_get_next_maya_occurrences(
+            date: Optional[str] = Query(None, description="查询开始日期（含当天），默认为今天"),
+            count: int = Query(1, ge=1, le=1000, description="返回的日期数量"),
+            birth_date: Optional[str] = Query(None, description="出生日期，查询下一个相同KIN码的银河生日"),
+            kin: Optional[int] = Query(None, description="KIN码（1-260）"),
+            seal: Optional[str] = Query(None, description="图腾名称或编号（1-20）"),
+            tone: Optional[str] = Query(None, description="调性名称或编号（1-13）"),
+            wavespell: Optional[int] = Query(None, description="波符编号（1-20）")
+        ):
+            """查询下一次（或下count次）满足条件的日期"""
+            self.logger.info(
+                f"查询下一个玛雅日期 | 开始日期: {date} | 生日: {birth_date} | kin: {kin} | 图腾: {seal} | 调性: {tone} | 波符: {wavespell}"
+            )
+            try:
+                if date:
+                    date = normalize_date_string(date)
+                if birth_date:
+                    birth_date = normalize_date_string(birth_date)
+                result = get_next_maya_occurrences(date, count, kin, seal, tone, wavespell, birth_date)
+                self.logger.info(f"下一个玛雅日期查询成功 | 共{len(result['occurrences'])}个日期")
+                return JSONResponse(content=result)
+            except ValueError as e:
+                self.logger.warning(f"玛雅日期查询参数无效: {str(e)}")
+                raise HTTPException(status_code=400, detail=str(e))
+            except Exception as e:
+                self.logger.error(f"下一个玛雅日期查询失败: {str(e)}")
+                raise HTTPException(status_code=500, detail=str(e))
+                
+        @self.app.get("/maya/oracle")
+        async def api_get_maya_oracle(
+            kin: Optional[int] = Query(None, ge=1, le=260, description="KIN码（1-260）"),
+            date: Optional[str] = Query(None, description="日期，格式为YYYY-MM-DD（未提供kin时使用，默认为今天）")
+        ):
+            """获取KIN码的神谕关系：引导、类比、对立、隐藏及波符位置"""
+            self.logger.info(f"获取玛雅神谕 | kin: {kin} | 日期: {date}")
+            try:
+                if kin is None:
+                    kin = calculate_kin_number(datetime.strptime(normalize_date_string(date), "%Y-%m-%d") if date else datetime.now())
+                return {"kin": kin, "oracle": get_maya_oracle(kin)}
+            except ValueError as e:
+                self.logger.warning(f"玛雅神谕参数无效: {str(e)}")
+                raise HTTPException(status_code=400, detail=str(e))
+            except Exception as e:
+                self.logger.error(f"玛雅神谕获取失败: {str(e)}")
+                raise HTTPException(status_code=500, detail=str(e))
+                
+        @self.app.post("/api/maya/oracle/batch")
+        async def api_get_maya_oracle_batch(request: Request):
+            """批量获取多个KIN码的神谕关系"""
+            try:
+                data = await request.json()
+                if not isinstance(data, dict):
+                    raise ValueError("请求体必须是JSON对象")
+                kins = data.get('kins')
+                if not kins:
+                    raise ValueError("缺少kins参数")
+                if not isinstance(kins, list) or not all(isinstance(k, int) and not isinstance(k, bool) for k in kins):
+                    raise ValueError("kins必须是整数列表")
+            except (ValueError, TypeError) as e:
+                self.logger.warning(f"批量玛雅神谕请求无效: {str(e)}")
+                raise HTTPException(status_code=400, detail=str(e))
+            
+            self.logger.info(f"批量获取玛雅神谕 | 数量: {len(kins)}")
+            fmt = resolve_columnar_format(request, data.get('format'))
+            try:
+                oracle = get_maya_oracle_batch(kins)
+            except (ValueError, TypeError) as e:
+                self.logger.warning(f"批量玛雅神谕参数无效: {str(e)}")
+                raise HTTPException(status_code=400, detail=str(e))
+            
+            if fmt != "json":
+                return columnar_response({name: values.astype(np.int16) for name, values in oracle.items()}, fmt)
+            return JSONResponse(content={name: values.tolist() for name, values in oracle.items()})
+                
+        @self.app.post("/api/maya/group-compatibility")
+        async def api_maya_group_compatibility(request: Request):
+            """计算群体成员之间的神谕关系（同KIN、类比、对立、隐藏、引导）"""
+            try:
+                data = await request.json()
+                birth_dates = parse_birth_dates_body(data)
+                max_partners = int(data.get('max_partners', 50))
+            except (ValueError, TypeError) as e:
+                self.logger.warning(f"玛雅群体关系请求无效: {str(e)}")
+                raise HTTPException(status_code=400, detail=str(e))
+            
+            self.logger.info(f"计算玛雅群体关系 | 人数: {len(birth_dates)}")
+            try:
+                result = calculate_maya_group_compatibility(birth_dates, max_partners)
+            except ValueError as e:
+                self.logger.warning(f"玛雅群体关系参数无效: {str(e)}")
+                raise HTTPException(status_code=400, detail=str(e))
+            except Exception as e:
+                self.logger.error(f"玛雅群体关系计算失败: {str(e)}")
+                raise HTTPException(status_code=500, detail=str(e))
+            
+            self.logger.info("玛雅群体关系计算成功")
+            return JSONResponse(content=result)
+                
         @self.app.post("/api/maya/birth-info")
         async def api_maya_birth_info(request: Request):
             """获取玛雅出生图信息"""
@@ -402,7 +862,7 @@ class UnifiedBackendService:
                 birth_date = data['birth_date']
                 self.logger.info(f"计算玛雅出生图 | 生日: {birth_date}")
                 
-                birth_info = get_maya_birth_info(birth_date)
+                birth_info = get_maya_birth_info(birth_date, get_client_id(request))
                 self.logger.info("玛雅出生图计算成功")
                 
                 return {
@@ -421,11 +881,11 @@ class UnifiedBackendService:
                 )
                 
         @self.app.get("/api/maya/history")
-        async def api_maya_history():
-            """获取玛雅历史记录"""
+        def api_maya_history(request: Request):
+            """获取玛雅历史记录（同步路由，SQLite读取在线程池中执行，不阻塞事件循环）"""
             self.logger.info("获取玛雅历史记录")
             try:
-                history = get_maya_history()
+                history = get_maya_history(get_client_id(request))
                 self.logger.info(f"返回{len(history)}条玛雅历史记录")
                 return {
                     "success": True,
@@ -439,13 +899,37 @@ class UnifiedBackendService:
                 )
                 
         @self.app.post("/api/maya/history")
-        async def api_save_maya_history():
+        async def api_save_maya_history(request: Request):
             """保存玛雅历史记录"""
-            self.logger.info("保存玛雅历史记录")
-            return {
-                "success": True,
-                "message": "历史记录已保存"
-            }
+            try:
+                data = await request.json()
+                if not data or 'birth_date' not in data:
+                    self.logger.warning("保存玛雅历史记录请求缺少birth_date参数")
+                    return JSONResponse(
+                        status_code=400,
+                        content={"success": False, "error": "缺少birth_date参数"}
+                    )
+                
+                birth_date = normalize_date_string(data['birth_date'])
+                self.logger.info(f"保存玛雅历史记录 | 生日: {birth_date}")
+                client_id = get_client_id(request)
+                if not update_maya_history(birth_date, client_id):
+                    return JSONResponse(
+                        status_code=400,
+                        content={"success": False, "error": "出生日期格式无效，请使用YYYY-MM-DD格式"}
+                    )
+                
+                return {
+                    "success": True,
+                    "message": "历史记录已保存",
+                    "history": await run_in_threadpool(get_maya_history, client_id)
+                }
+            except Exception as e:
+                self.logger.error(f"保存玛雅历史记录失败: {str(e)}")
+                return JSONResponse(
+                    status_code=500,
+                    content={"success": False, "error": str(e)}
+                )
             
         # ==================== 穿搭建议相关接口 ====================
         
@@ -477,12 +961,13 @@ class UnifiedBackendService:
         @self.app.get("/dress/range")
         async def api_get_dress_range(
             days_before: int = Query(1, description="当前日期之前的天数"),
-            days_after: int = Query(6, description="当前日期之后的天数")
+            days_after: int = Query(6, description="当前日期之后的天数"),
+            compact: bool = Query(False, description="紧凑模式：重复的日柱信息、颜色列表和描述只在dictionary中出现一次，记录中为其下标")
         ):
             """获取一段时间内的穿衣颜色和饮食建议"""
             self.logger.info(f"获取穿搭建议范围 | 前{days_before}天 | 后{days_after}天")
             try:
-                result = get_dress_info_range(days_before, days_after)
+                result = get_dress_info_range(days_before, days_after, compact)
                 self.logger.info(f"穿搭建议范围获取成功 | 共{len(result.get('dress_info_list', []))}天数据")
                 return result
             except Exception as e:
@@ -493,12 +978,15 @@ class UnifiedBackendService:
         
         @self.app.get("/biorhythm")
         async def legacy_get_biorhythm_range(
+            request: Request,
             birth_date: str = Query(...),
             days_before: int = Query(10),
-            days_after: int = Query(20)
+            days_after: int = Query(20),
+            stream: bool = Query(False),
+            format: Optional[str] = Query(None)
         ):
             """旧版API路径，重定向到新路径"""
-            return await api_get_biorhythm_range(birth_date, days_before, days_after)
+            return await api_get_biorhythm_range(request, birth_date, days_before, days_after, stream, format)
             
     def run(self, host='0.0.0.0', port=5000, debug=False):
         """启动服务"""
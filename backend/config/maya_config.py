@@ -196,6 +196,13 @@ MAYA_MONTHS = [
     "宇宙乌龟月"
 ]
 
+# 13月历：每年自7月26日开始，13个月每月28天共364天，
+# 7月25日为第365天"无时间日"，不属于任何月份；2月29日为"零日"，不计入13月历的天数
+THIRTEEN_MOON_YEAR_START = (7, 26)
+THIRTEEN_MOON_MONTH_DAYS = 28
+DAY_OUT_OF_TIME_NAME = "无时间日"
+HUNAB_KU_NAME = "零日"
+
 # 建议和禁忌
 SUGGESTIONS = {
     "建议": [
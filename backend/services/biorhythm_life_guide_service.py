@@ -8,13 +8,17 @@
 import json
 import os
 import sys
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, date
 from typing import Dict, Any, List, Optional
 import numpy as np
 
 # 添加项目根目录到Python路径
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from utils.date_utils import parse_date, get_date_range
+from utils.biorhythm_table import get_biorhythm_table
+from utils.cache_manager import cache_manager
+from services.biorhythm_service import calculate_biorhythm_window
+from services.life_guide_rules import get_rule_table
 
 # 加载配置
 config_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config', 'app_config.json')
@@ -24,6 +28,14 @@ with open(config_path, 'r', encoding='utf-8') as f:
 # 获取生物节律周期配置
 CYCLES = config['biorhythm']['cycles']
 
+# 指南图表覆盖今天之前15天到之后14天，今日数据和7天趋势都取自同一窗口
+CHART_DAYS_BEFORE = 15
+CHART_DAYS_AFTER = 14
+WEEKLY_DAYS = 7
+
+# 英文星期名称（与strftime("%A")一致），下标0为星期一
+WEEKDAY_NAMES_EN = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
 class BiorhythmLifeGuideService:
     """综合生物节律生活指南服务"""
     
@@ -58,7 +70,7 @@ class BiorhythmLifeGuideService:
     
     def calculate_rhythm_value(self, cycle: int, days_since_birth: int) -> int:
         """计算特定周期的节律值"""
-        return int(100 * np.sin(2 * np.pi * days_since_birth / cycle))
+        return get_biorhythm_table(CYCLES).lookup(cycle, days_since_birth)
     
     def calculate_biorhythm(self, birth_date: str, target_date: str) -> Dict[str, int]:
         """计算特定日期的生物节律值"""
@@ -90,28 +102,34 @@ class BiorhythmLifeGuideService:
             dict: 包含完整生活指南数据的字典
         """
         try:
+            # 一次性计算图表窗口，今日数据、7天趋势和图表数据共用
+            window = self.calculate_guide_window(birth_date)
+            
             # 计算今日生物节律
-            today_data = self.calculate_biorhythm(birth_date, datetime.now().strftime("%Y-%m-%d"))
+            today_data = self._window_day(window, CHART_DAYS_BEFORE)
             
             # 计算未来7天生物节律趋势
-            weekly_trend = self.calculate_weekly_trend(birth_date)
+            weekly_trend = self.calculate_weekly_trend(birth_date, window)
             
             # 获取默认天气数据
             weather_data = self._get_default_weather_data()
             
+            # 规则表只求值一次，各类建议共用结果
+            rules = self._evaluate_rules(today_data)
+            
             # 生成个性化建议
             personal_recommendations = self._generate_personal_recommendations(
-                today_data, weather_data
+                rules, weather_data
             )
             
             # 生成报告摘要
             report_summary = self._generate_report_summary(today_data)
             
             # 生成图表数据
-            chart_data = self._generate_chart_data(birth_date)
+            chart_data = self._generate_chart_data(birth_date, window)
             
             # 生成穿衣建议
-            dress_recommendations = self._generate_dress_recommendations(today_data)
+            dress_recommendations = self._generate_dress_recommendations(rules)
             
             return {
                 "success": True,
@@ -133,24 +151,48 @@ class BiorhythmLifeGuideService:
                 "error": f"生成生活指南失败: {str(e)}"
             }
     
-    def calculate_weekly_trend(self, birth_date: str) -> List[Dict[str, Any]]:
+    def calculate_guide_window(self, birth_date: str, today: Optional[date] = None) -> Dict[str, np.ndarray]:
+        """向量化计算指南所需的整个日期窗口（列式结果）"""
+        today = today or datetime.now().date()
+        return calculate_biorhythm_window(
+            birth_date,
+            today - timedelta(days=CHART_DAYS_BEFORE),
+            today + timedelta(days=CHART_DAYS_AFTER)
+        )
+    
+    def _window_day(self, window: Dict[str, np.ndarray], index: int) -> Dict[str, int]:
+        """取窗口中某一天的节律值"""
+        return {
+            "physical": int(window["physical"][index]),
+            "emotional": int(window["emotional"][index]),
+            "intellectual": int(window["intellectual"][index])
+        }
+    
+    def calculate_weekly_trend(self, birth_date: str, window: Optional[Dict[str, np.ndarray]] = None) -> List[Dict[str, Any]]:
         """计算未来7天生物节律趋势"""
-        weekly_trend = []
-        today = datetime.now()
+        if window is None:
+            window = self.calculate_guide_window(birth_date)
         
-        for i in range(7):
-            date = today + timedelta(days=i)
-            date_str = date.strftime("%Y-%m-%d")
-            
-            rhythm_data = self.calculate_biorhythm(birth_date, date_str)
-            
+        week = slice(CHART_DAYS_BEFORE, CHART_DAYS_BEFORE + WEEKLY_DAYS)
+        dates = window["dates"][week]
+        # 1970-01-01为星期四，据此由日期序号得到星期（0为星期一）
+        weekdays = ((dates.astype(np.int64) + 3) % 7).tolist()
+        
+        weekly_trend = []
+        for date_str, weekday, physical, emotional, intellectual in zip(
+            np.datetime_as_string(dates, unit='D').tolist(),
+            weekdays,
+            window["physical"][week].tolist(),
+            window["emotional"][week].tolist(),
+            window["intellectual"][week].tolist()
+        ):
             weekly_trend.append({
                 "date": date_str,
-                "physical": rhythm_data["physical"],
-                "emotional": rhythm_data["emotional"],
-                "intellectual": rhythm_data["intellectual"],
-                "day_of_week": date.strftime("%A"),
-                "day_type": "weekday" if date.weekday() < 5 else "weekend"
+                "physical": physical,
+                "emotional": emotional,
+                "intellectual": intellectual,
+                "day_of_week": WEEKDAY_NAMES_EN[weekday],
+                "day_type": "weekday" if weekday < 5 else "weekend"
             })
         
         return weekly_trend
@@ -185,8 +227,8 @@ class BiorhythmLifeGuideService:
             "intellectual_status": self._get_rhythm_status(today_data["intellectual"])
         }
     
-    def _generate_personal_recommendations(self, today_data: Dict[str, int], weather_data: Dict[str, Any]) -> Dict[str, List[str]]:
-        """生成个性化建议"""
+    def _generate_personal_recommendations(self, rules: Dict[str, List[str]], weather_data: Dict[str, Any]) -> Dict[str, List[str]]:
+        """生成个性化建议（rules为_evaluate_rules的结果）"""
         recommendations = {
             "dressing": [],
             "diet": [],
@@ -197,17 +239,17 @@ class BiorhythmLifeGuideService:
         
         # 穿衣建议
         recommendations["dressing"] = self._generate_dressing_recommendations(
-            today_data, weather_data
+            rules, weather_data
         )
         
         # 饮食建议
-        recommendations["diet"] = self._generate_diet_recommendations(today_data)
+        recommendations["diet"] = self._generate_diet_recommendations(rules)
         
         # 活动建议
-        recommendations["activities"] = self._generate_activity_recommendations(today_data)
+        recommendations["activities"] = self._generate_activity_recommendations(rules)
         
         # 健康建议
-        recommendations["health"] = self._generate_health_recommendations(today_data)
+        recommendations["health"] = self._generate_health_recommendations(rules)
         
         # 天气相关建议
         recommendations["weather_related"] = self._generate_weather_recommendations(
@@ -216,52 +258,24 @@ class BiorhythmLifeGuideService:
         
         return recommendations
     
-    def _generate_dress_recommendations(self, today_data: Dict[str, int]) -> Dict[str, Any]:
+    def _evaluate_rules(self, today_data: Dict[str, int]) -> Dict[str, List[str]]:
+        """用规则表计算单日各类别的建议"""
+        series = {name: np.array([today_data[name]]) for name in ("physical", "emotional", "intellectual")}
+        return get_rule_table().recommendations(series)[0]
+    
+    def _generate_dress_recommendations(self, rules: Dict[str, List[str]]) -> Dict[str, Any]:
         """生成穿衣建议"""
-        dress_recommendations = {
-            "color_suggestions": [],
-            "style_suggestions": [],
-            "accessory_suggestions": []
-        }
-        
         # 根据节律状态选择颜色
-        if today_data["physical"] > 50:
-            dress_recommendations["color_suggestions"].append("👕 今天体力充沛，适合穿着运动休闲风格的衣服")
-            dress_recommendations["style_suggestions"].append("🏃 适合运动风格，便于活动")
-        elif today_data["physical"] < -50:
-            dress_recommendations["color_suggestions"].append("👕 今天体力较差，建议选择舒适宽松的衣服")
-            dress_recommendations["style_suggestions"].append("💤 适合宽松舒适的家居风格")
-        
-        if today_data["emotional"] > 50:
-            dress_recommendations["color_suggestions"].append("🎨 情绪积极，可以尝试明亮的颜色来提升心情")
-            dress_recommendations["accessory_suggestions"].append("✨ 可以佩戴一些亮色饰品")
-        elif today_data["emotional"] < -50:
-            dress_recommendations["color_suggestions"].append("🎨 情绪可能低落，建议选择温和的中性色调")
-            dress_recommendations["accessory_suggestions"].append("🌿 选择简约低调的配饰")
-        
-        if today_data["intellectual"] > 50:
-            dress_recommendations["color_suggestions"].append("🧠 思维活跃，适合穿着专业得体的服装")
-            dress_recommendations["style_suggestions"].append("📚 适合商务或学术场合的着装")
-        elif today_data["intellectual"] < -50:
-            dress_recommendations["color_suggestions"].append("🧠 思维效率一般，建议穿着舒适但不过于随意的服装")
-            dress_recommendations["style_suggestions"].append("🛋️ 适合居家办公或轻松场合")
-        
-        return dress_recommendations
+        return {
+            "color_suggestions": rules.get("dress_color", []),
+            "style_suggestions": rules.get("dress_style", []),
+            "accessory_suggestions": rules.get("dress_accessory", [])
+        }
     
-    def _generate_dressing_recommendations(self, today_data: Dict[str, int], weather_data: Dict[str, Any]) -> List[str]:
+    def _generate_dressing_recommendations(self, rules: Dict[str, List[str]], weather_data: Dict[str, Any]) -> List[str]:
         """生成穿衣建议"""
-        recommendations = []
-        
         # 根据节律状态选择颜色
-        if today_data["physical"] > 50:
-            recommendations.append("👕 今天体力充沛，适合穿着运动休闲风格的衣服")
-        elif today_data["physical"] < -50:
-            recommendations.append("👕 今天体力较差，建议选择舒适宽松的衣服")
-        
-        if today_data["emotional"] > 50:
-            recommendations.append("🎨 情绪积极，可以尝试明亮的颜色来提升心情")
-        elif today_data["emotional"] < -50:
-            recommendations.append("🎨 情绪可能低落，建议选择温和的中性色调")
+        recommendations = list(rules.get("dressing", []))
         
         # 根据天气调整穿衣建议
         if weather_data and "current" in weather_data:
@@ -280,75 +294,17 @@ class BiorhythmLifeGuideService:
         
         return recommendations
     
-    def _generate_diet_recommendations(self, today_data: Dict[str, int]) -> List[str]:
+    def _generate_diet_recommendations(self, rules: Dict[str, List[str]]) -> List[str]:
         """生成饮食建议"""
-        recommendations = []
-        
-        if today_data["physical"] > 50:
-            recommendations.append("🍎 体力充沛，可以适当增加蛋白质摄入")
-        elif today_data["physical"] < -50:
-            recommendations.append("🍎 体力较差，建议选择易消化的食物")
-        
-        if today_data["emotional"] > 50:
-            recommendations.append("🍌 情绪积极，可以享受喜欢的食物")
-        elif today_data["emotional"] < -50:
-            recommendations.append("🍫 情绪可能低落，可以适当吃些甜食提升心情")
-        
-        if today_data["intellectual"] > 50:
-            recommendations.append("🥜 思维活跃，建议补充富含Omega-3的食物")
-        elif today_data["intellectual"] < -50:
-            recommendations.append("🍵 思维效率一般，建议多喝水保持清醒")
-        
-        return recommendations
+        return rules.get("diet", [])
     
-    def _generate_activity_recommendations(self, today_data: Dict[str, int]) -> List[str]:
+    def _generate_activity_recommendations(self, rules: Dict[str, List[str]]) -> List[str]:
         """生成活动建议"""
-        recommendations = []
-        
-        if today_data["physical"] > 50:
-            recommendations.append("🏃 体力充沛，适合进行体育锻炼")
-        elif today_data["physical"] < -50:
-            recommendations.append("💤 体力较差，建议进行轻度活动或休息")
-        
-        if today_data["emotional"] > 50:
-            recommendations.append("🎭 情绪积极，适合社交活动")
-        elif today_data["emotional"] < -50:
-            recommendations.append("📖 情绪可能低落，建议独处或进行安静活动")
-        
-        if today_data["intellectual"] > 50:
-            recommendations.append("📚 思维敏捷，适合学习和创造性工作")
-        elif today_data["intellectual"] < -50:
-            recommendations.append("🧘 思维效率一般，建议处理常规任务")
-        
-        return recommendations
+        return rules.get("activities", [])
     
-    def _generate_health_recommendations(self, today_data: Dict[str, int]) -> List[str]:
+    def _generate_health_recommendations(self, rules: Dict[str, List[str]]) -> List[str]:
         """生成健康建议"""
-        recommendations = []
-        
-        # 综合健康建议
-        total_score = today_data["physical"] + today_data["emotional"] + today_data["intellectual"]
-        
-        if total_score >= 200:
-            recommendations.append("💪 今天状态极佳，充分利用这一天！")
-        elif total_score >= 100:
-            recommendations.append("👍 今天状态良好，保持积极心态")
-        elif total_score >= 0:
-            recommendations.append("😊 今天状态平稳，注意劳逸结合")
-        elif total_score >= -100:
-            recommendations.append("⚠️ 今天状态一般，注意休息和放松")
-        else:
-            recommendations.append("🛌 今天状态较差，建议多休息")
-        
-        # 睡眠建议
-        if today_data["physical"] < -30:
-            recommendations.append("💤 体力节律较低，建议今晚早点休息")
-        
-        # 压力管理
-        if today_data["emotional"] < -30:
-            recommendations.append("🧘 情绪可能波动，建议进行冥想或深呼吸")
-        
-        return recommendations
+        return rules.get("health", [])
     
     def _generate_weather_recommendations(self, weather_data: Dict[str, Any]) -> List[str]:
         """生成天气相关建议"""
@@ -376,33 +332,46 @@ class BiorhythmLifeGuideService:
         
         return recommendations
     
-    def _generate_chart_data(self, birth_date: str) -> Dict[str, Any]:
+    def _generate_chart_data(self, birth_date: str, window: Optional[Dict[str, np.ndarray]] = None) -> Dict[str, Any]:
         """生成图表数据"""
-        # 生成30天的节律数据用于图表显示
-        dates = []
-        physical_data = []
-        emotional_data = []
-        intellectual_data = []
-        
-        today = datetime.now()
-        for i in range(-15, 15):
-            date = today + timedelta(days=i)
-            date_str = date.strftime("%Y-%m-%d")
-            
-            rhythm_data = self.calculate_biorhythm(birth_date, date_str)
-            
-            dates.append(date_str)
-            physical_data.append(rhythm_data["physical"])
-            emotional_data.append(rhythm_data["emotional"])
-            intellectual_data.append(rhythm_data["intellectual"])
+        # 30天的节律数据用于图表显示
+        if window is None:
+            window = self.calculate_guide_window(birth_date)
         
         return {
-            "dates": dates,
-            "physical": physical_data,
-            "emotional": emotional_data,
-            "intellectual": intellectual_data
+            "dates": np.datetime_as_string(window["dates"], unit='D').tolist(),
+            "physical": window["physical"].tolist(),
+            "emotional": window["emotional"].tolist(),
+            "intellectual": window["intellectual"].tolist()
         }
     
+    def generate_guide_range(self, birth_date: str, start_date, end_date) -> List[Dict[str, Any]]:
+        """
+        生成日期范围内每天的节律值和规则建议
+        整个窗口只做一次节律计算和一次规则表求值
+        """
+        window = calculate_biorhythm_window(birth_date, start_date, end_date)
+        series = {name: window[name] for name in ("physical", "emotional", "intellectual")}
+        daily_rules = get_rule_table().recommendations(series)
+        
+        days = []
+        for date_str, physical, emotional, intellectual, rules in zip(
+            np.datetime_as_string(window["dates"], unit='D').tolist(),
+            window["physical"].tolist(),
+            window["emotional"].tolist(),
+            window["intellectual"].tolist(),
+            daily_rules
+        ):
+            days.append({
+                "date": date_str,
+                "physical": physical,
+                "emotional": emotional,
+                "intellectual": intellectual,
+                "total_score": physical + emotional + intellectual,
+                "recommendations": rules
+            })
+        return days
+    
     def _get_rhythm_status(self, value: int) -> str:
         """获取节律状态描述"""
         abs_value = abs(value)
@@ -448,11 +417,34 @@ def get_biorhythm_life_guide(birth_date: str, location: Optional[str] = None) ->
     Returns:
         dict: 生活指南数据
     """
-    return life_guide_service.generate_comprehensive_guide(birth_date, location)
+    # 指南只取决于出生日期、地理位置和当天日期，按天缓存到当天结束
+    now = datetime.now()
+    cache_key = f"life_guide_{birth_date}_{location}_{now.strftime('%Y-%m-%d')}"
+    cached_result = cache_manager.get(cache_key)
+    if cached_result is not None:
+        return cached_result
+    
+    result = life_guide_service.generate_comprehensive_guide(birth_date, location)
+    if result.get("success"):
+        tomorrow = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+        cache_manager.set(cache_key, result, max(1, int((tomorrow - now).total_seconds())))
+    return result
+
+def get_biorhythm_guide_range(birth_date: str, days_before: int, days_after: int) -> Dict[str, Any]:
+    """获取一段时间内每天的生物节律生活建议"""
+    start_date, end_date = get_date_range(datetime.now().date(), days_before, days_after)
+    return {
+        "birth_date": birth_date,
+        "date_range": {
+            "start": start_date.strftime("%Y-%m-%d"),
+            "end": end_date.strftime("%Y-%m-%d")
+        },
+        "days": life_guide_service.generate_guide_range(birth_date, start_date, end_date)
+    }
 
 def get_today_biorhythm_guide(birth_date: str) -> Dict[str, Any]:
     """获取今日生物节律生活指南"""
-    return life_guide_service.generate_comprehensive_guide(birth_date)
+    return get_biorhythm_life_guide(birth_date)
 
 if __name__ == "__main__":
     # 测试服务
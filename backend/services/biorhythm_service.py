@@ -1,14 +1,15 @@
 import numpy as np
-import pandas as pd
 import datetime
 import json
 import os
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator
 import sys
 
 # 添加项目根目录到Python路径
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from utils.date_utils import parse_date, get_date_range
+from utils.date_utils import parse_date, get_date_range, parse_date_array
+from utils.biorhythm_table import get_biorhythm_table
+from utils.history_store import history_store, DEFAULT_CLIENT_ID
 
 # 加载配置
 config_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config', 'app_config.json')
@@ -19,12 +20,63 @@ with open(config_path, 'r', encoding='utf-8') as f:
 CYCLES = config['biorhythm']['cycles']
 MAX_HISTORY = config['biorhythm']['max_history']
 
-# 存储用户历史查询的出生日期
-history_dates = []
+# 根据周期配置预计算节律查找表
+get_biorhythm_table(CYCLES)
+
+# 批量计算的矩阵规模上限（人数 × 天数）
+MAX_BATCH_CELLS = 5000000
+
+# 流式输出时每块包含的天数
+STREAM_CHUNK_DAYS = 366
+
+# 返回完整兼容度矩阵的最大人数，更大的群体需要使用top_k模式
+MAX_COMPATIBILITY_MATRIX_SIZE = 1000
+# top_k模式下每次计算的行数，限制中间矩阵的内存占用
+COMPATIBILITY_CHUNK_ROWS = 256
+
+# 每个周期内按四分之一周期依次出现的节律事件
+# 第q个事件精确位于出生后 q * cycle / 4 天处，q % 4 决定事件类型
+EVENT_TYPES = ["critical_up", "peak", "critical_down", "trough"]
+# 同一天重合的临界周期数 -> 重合类型（更多周期时为"<n>-fold"）
+COINCIDENCE_TYPES = {1: "single", 2: "double", 3: "triple"}
+
+# 历史记录类别
+HISTORY_NAMESPACE = "biorhythm"
 
 def calculate_rhythm_value(cycle: int, days_since_birth: int) -> int:
     """计算特定周期的节律值"""
-    return int(100 * np.sin(2 * np.pi * days_since_birth / cycle))
+    return get_biorhythm_table(CYCLES).lookup(cycle, days_since_birth)
+
+def calculate_rhythm_arrays(days_since_birth) -> Dict[str, np.ndarray]:
+    """
+    向量化计算所有配置周期的节律值
+    
+    Args:
+        days_since_birth: 距出生日期的天数，可以是任意形状的整数数组
+        
+    Returns:
+        dict: 周期名称 -> 与输入同形状的节律值数组（int16）
+    """
+    return get_biorhythm_table(CYCLES).gather(days_since_birth)
+
+def calculate_biorhythm_window(birth_date, start_date, end_date) -> Dict[str, np.ndarray]:
+    """
+    一次性计算日期窗口内每天的生物节律值（列式结果）
+    
+    Returns:
+        dict: "dates"为datetime64[D]数组，其余键为各周期的节律值数组
+    """
+    birth_day = np.datetime64(parse_date(birth_date), 'D')
+    start_day = np.datetime64(parse_date(start_date), 'D')
+    end_day = np.datetime64(parse_date(end_date), 'D')
+    
+    # 整个窗口转换为一个日期数组和一个天数偏移数组
+    dates = np.arange(start_day, end_day + 1, dtype='datetime64[D]')
+    days_since_birth = (dates - birth_day).astype(np.int64)
+    
+    result = {"dates": dates}
+    result.update(calculate_rhythm_arrays(days_since_birth))
+    return result
 
 def calculate_biorhythm(birth_date, target_date):
     """计算特定日期的生物节律值"""
@@ -40,27 +92,18 @@ def calculate_biorhythm(birth_date, target_date):
 
     return physical_value, emotional_value, intellectual_value
 
-def update_history(birth_date: str):
+def update_history(birth_date: str, client_id: str = DEFAULT_CLIENT_ID):
     """更新历史记录"""
-    global history_dates
-    
-    # 如果日期已经在历史记录中，先移除它
-    if birth_date in history_dates:
-        history_dates.remove(birth_date)
-    # 将新日期添加到列表开头
-    history_dates.insert(0, birth_date)
-    # 保持列表长度不超过MAX_HISTORY
-    if len(history_dates) > MAX_HISTORY:
-        history_dates = history_dates[:MAX_HISTORY]
-
-def get_history():
+    history_store.record(HISTORY_NAMESPACE, client_id, birth_date, MAX_HISTORY)
+
+def get_history(client_id: str = DEFAULT_CLIENT_ID):
     """获取历史记录"""
-    return history_dates
+    return history_store.get(HISTORY_NAMESPACE, client_id, MAX_HISTORY)
 
-def get_today_biorhythm(birth_date: str):
+def get_today_biorhythm(birth_date: str, client_id: str = DEFAULT_CLIENT_ID):
     """获取今天的生物节律"""
     # 更新历史记录
-    update_history(birth_date)
+    update_history(birth_date, client_id)
     
     current_date = datetime.datetime.now().date()
     physical, emotional, intellectual = calculate_biorhythm(birth_date, current_date)
@@ -72,10 +115,10 @@ def get_today_biorhythm(birth_date: str):
         "intellectual": intellectual
     }
 
-def get_date_biorhythm(birth_date: str, date: str):
+def get_date_biorhythm(birth_date: str, date: str, client_id: str = DEFAULT_CLIENT_ID):
     """获取指定日期的生物节律"""
     # 更新历史记录
-    update_history(birth_date)
+    update_history(birth_date, client_id)
     
     physical, emotional, intellectual = calculate_biorhythm(birth_date, date)
     
@@ -86,39 +129,280 @@ def get_date_biorhythm(birth_date: str, date: str):
         "intellectual": intellectual
     }
 
-def get_biorhythm_range(birth_date: str, days_before: int, days_after: int):
-    """获取一段时间内的生物节律"""
+def get_biorhythm_range_arrays(birth_date: str, days_before: int, days_after: int,
+                               client_id: str = DEFAULT_CLIENT_ID) -> Dict[str, np.ndarray]:
+    """获取一段时间内的生物节律（列式NumPy数组）"""
     # 更新历史记录
-    update_history(birth_date)
+    update_history(birth_date, client_id)
     
-    birth_date_obj = parse_date(birth_date)
     current_date = datetime.datetime.now().date()
     
     # 计算日期范围
     start_date, end_date = get_date_range(current_date, days_before, days_after)
     
-    # 创建日期范围
-    date_range = pd.date_range(start=start_date, end=end_date)
+    # 向量化计算整个窗口的节律值
+    return calculate_biorhythm_window(birth_date, start_date, end_date)
+
+def get_biorhythm_range(birth_date: str, days_before: int, days_after: int, client_id: str = DEFAULT_CLIENT_ID):
+    """获取一段时间内的生物节律"""
+    window = get_biorhythm_range_arrays(birth_date, days_before, days_after, client_id)
+    
+    return {
+        "dates": np.datetime_as_string(window["dates"], unit='D').tolist(),
+        "physical": window["physical"].tolist(),
+        "emotional": window["emotional"].tolist(),
+        "intellectual": window["intellectual"].tolist()
+    }
+
+def _iter_biorhythm_chunks(birth_date, start_date, end_date, chunk_days: int) -> Iterator[List[Dict[str, Any]]]:
+    """按块计算日期窗口内的生物节律，每块为逐日记录列表"""
+    start_day = np.datetime64(parse_date(start_date), 'D')
+    end_day = np.datetime64(parse_date(end_date), 'D')
+    
+    chunk_start = start_day
+    while chunk_start <= end_day:
+        chunk_end = min(chunk_start + chunk_days - 1, end_day)
+        window = calculate_biorhythm_window(birth_date, chunk_start.item(), chunk_end.item())
+        dates = np.datetime_as_string(window["dates"], unit='D').tolist()
+        columns = [(name, window[name].tolist()) for name in CYCLES]
+        yield [
+            dict([("date", date)] + [(name, values[i]) for name, values in columns])
+            for i, date in enumerate(dates)
+        ]
+        chunk_start = chunk_end + 1
+
+def iter_biorhythm_range(birth_date: str, days_before: int, days_after: int,
+                         client_id: str = DEFAULT_CLIENT_ID, chunk_days: int = STREAM_CHUNK_DAYS) -> Iterator[List[Dict[str, Any]]]:
+    """
+    以生成器方式获取一段时间内的生物节律，用于流式响应
+    内存占用只与chunk_days有关，与窗口长度无关
+    """
+    # 在开始输出前校验日期并更新历史记录，不随生成器延迟
+    birth_date_obj = parse_date(birth_date)
+    update_history(birth_date, client_id)
     
-    # 初始化结果数组
-    dates = []
-    physical_values = []
-    emotional_values = []
-    intellectual_values = []
+    current_date = datetime.datetime.now().date()
+    start_date, end_date = get_date_range(current_date, days_before, days_after)
+    return _iter_biorhythm_chunks(birth_date_obj, start_date, end_date, chunk_days)
+
+def calculate_biorhythm_batch(birth_dates: List[str], start_date, end_date) -> Dict[str, np.ndarray]:
+    """
+    批量计算多个出生日期在同一日期窗口内的生物节律
+    以（人数 × 天数）二维矩阵一次性广播计算，不更新历史记录
     
-    # 计算每一天的节律值
-    for date in date_range:
-        date_obj = date.date()  # 转换为date对象，避免时区问题
-        physical, emotional, intellectual = calculate_biorhythm(birth_date_obj, date_obj)
+    Args:
+        birth_dates: 出生日期列表
+        start_date: 窗口开始日期
+        end_date: 窗口结束日期
         
-        dates.append(date_obj.strftime("%Y-%m-%d"))
-        physical_values.append(physical)
-        emotional_values.append(emotional)
-        intellectual_values.append(intellectual)
+    Returns:
+        dict: "birth_dates"(人数,)与"dates"(天数,)为datetime64[D]数组，
+              其余键为各周期的(人数, 天数)节律值矩阵
+    """
+    if not birth_dates:
+        raise ValueError("birth_dates不能为空")
+    
+    births = parse_date_array(birth_dates)
+    start_day = np.datetime64(parse_date(start_date), 'D')
+    end_day = np.datetime64(parse_date(end_date), 'D')
+    if end_day < start_day:
+        raise ValueError("结束日期不能早于开始日期")
+    dates = np.arange(start_day, end_day + 1, dtype='datetime64[D]')
+    
+    if len(births) * len(dates) > MAX_BATCH_CELLS:
+        raise ValueError(f"批量计算规模过大，人数×天数不能超过{MAX_BATCH_CELLS}")
+    
+    # (人数, 1) 与 (1, 天数) 广播为 (人数, 天数) 的天数矩阵
+    days_since_birth = (dates[np.newaxis, :] - births[:, np.newaxis]).astype(np.int64)
+    
+    result = {"birth_dates": births, "dates": dates}
+    result.update(calculate_rhythm_arrays(days_since_birth))
+    return result
+
+def get_biorhythm_batch(birth_dates: List[str], start_date, end_date) -> Dict[str, Any]:
+    """
+    批量计算多个出生日期在同一日期窗口内的生物节律
+    
+    Returns:
+        dict: 共享的日期列表和每个出生日期的节律值列
+    """
+    batch = calculate_biorhythm_batch(birth_dates, start_date, end_date)
+    values = {name: batch[name].tolist() for name in CYCLES}
+    
+    subjects = []
+    for i, birth_date in enumerate(birth_dates):
+        subject = {"birth_date": birth_date}
+        for name in values:
+            subject[name] = values[name][i]
+        subjects.append(subject)
     
     return {
-        "dates": dates,
-        "physical": physical_values,
-        "emotional": emotional_values,
-        "intellectual": intellectual_values
-    }
\ No newline at end of file
+        "dates": np.datetime_as_string(batch["dates"], unit='D').tolist(),
+        "subjects": subjects
+    }
+
+def _event_day(quarter, cycle: int):
+    """第quarter个四分之一周期事件所在的天数（取最近的整数天，恰好居中时取后一天）"""
+    return (quarter * cycle + 2) // 4
+
+def _first_event_quarter(cycle: int, start_day: int) -> int:
+    """首个不早于start_day的事件序号，即满足 _event_day(q) >= start_day 的最小q"""
+    return -((2 - 4 * start_day) // cycle)
+
+def _last_event_quarter(cycle: int, end_day: int) -> int:
+    """最后一个不晚于end_day的事件序号"""
+    return (4 * end_day + 1) // cycle
+
+def _next_event_quarters(cycle: int, start_day: int, end_day: int, phase: int, step: int, count: int) -> np.ndarray:
+    """
+    求解后续事件序号（按时间顺序，最多count个，不超过end_day）
+    目标事件的序号满足 q % step == phase，构成等差数列
+    """
+    first = _first_event_quarter(cycle, start_day)
+    first += (phase - first) % step
+    last = min(_last_event_quarter(cycle, end_day), first + step * (count - 1))
+    return np.arange(first, last + 1, step, dtype=np.int64)
+
+def _is_critical_day(cycle: int, day: int) -> bool:
+    """判断某天是否为该周期的临界日"""
+    first = _first_event_quarter(cycle, day)
+    return _event_day(first + first % 2, cycle) == day
+
+def find_critical_days(birth_date, start_date=None, count: int = 5, horizon_days: int = 3650,
+                       min_cycles: int = 2) -> Dict[str, Any]:
+    """
+    通过模运算直接求解后续的临界日（过零点）、高峰日和低谷日
+    
+    Args:
+        birth_date: 出生日期
+        start_date: 查询开始日期，默认为今天
+        count: 每种事件返回的最大数量
+        horizon_days: 查询的天数范围
+        min_cycles: 多周期重合临界日的最少周期数
+        
+    Returns:
+        dict: 每个周期的事件列表以及多个周期同时处于临界日的日期
+    """
+    birth_day = np.datetime64(parse_date(birth_date), 'D')
+    start = np.datetime64(parse_date(start_date), 'D')
+    start_day = int((start - birth_day).astype(np.int64))
+    end_day = start_day + horizon_days
+    
+    table = get_biorhythm_table(CYCLES)
+    
+    def to_events(quarters: np.ndarray, cycle: int) -> List[Dict[str, Any]]:
+        days = _event_day(quarters, cycle)
+        dates = np.datetime_as_string(birth_day + days, unit='D').tolist()
+        return [
+            {"date": date, "days_since_birth": day, "value": table.lookup(cycle, day), "type": EVENT_TYPES[quarter % 4]}
+            for date, day, quarter in zip(dates, days.tolist(), quarters.tolist())
+        ]
+    
+    cycles = {}
+    critical_days_by_cycle = []
+    for name, cycle in CYCLES.items():
+        cycles[name] = {
+            "cycle": cycle,
+            "critical_days": to_events(_next_event_quarters(cycle, start_day, end_day, 0, 2, count), cycle),
+            "peaks": to_events(_next_event_quarters(cycle, start_day, end_day, 1, 4, count), cycle),
+            "troughs": to_events(_next_event_quarters(cycle, start_day, end_day, 3, 4, count), cycle)
+        }
+        
+        # 范围内该周期的全部临界日（偶数序号），用于求多周期重合
+        first = _first_event_quarter(cycle, start_day)
+        quarters = np.arange(first + first % 2, _last_event_quarter(cycle, end_day) + 1, 2, dtype=np.int64)
+        critical_days_by_cycle.append(_event_day(quarters, cycle))
+    
+    # 合并各周期的临界日并统计同一天出现的周期数
+    coincidences = []
+    if critical_days_by_cycle:
+        all_days = np.concatenate(critical_days_by_cycle)
+        days, counts = np.unique(all_days, return_counts=True)
+        days = days[counts >= min_cycles][:count]
+        dates = np.datetime_as_string(birth_day + days, unit='D').tolist()
+        for date, day in zip(dates, days.tolist()):
+            names = [name for name, cycle in CYCLES.items() if _is_critical_day(cycle, day)]
+            coincidences.append({
+                "date": date,
+                "days_since_birth": day,
+                "cycles": names,
+                "type": COINCIDENCE_TYPES.get(len(names), f"{len(names)}-fold")
+            })
+    
+    return {
+        "birth_date": str(birth_day),
+        "start_date": str(start),
+        "end_date": str(start + horizon_days),
+        "cycles": cycles,
+        "coincidences": coincidences
+    }
+
+def _overall_sync(sync: Dict[str, np.ndarray]) -> np.ndarray:
+    """各周期同步度的平均值（四舍五入取整）"""
+    total = sum(values.astype(np.int32) for values in sync.values())
+    return ((2 * total + len(sync)) // (2 * len(sync))).astype(np.int16)
+
+def calculate_compatibility(birth_date_a, birth_date_b) -> Dict[str, Any]:
+    """
+    计算两人生物节律的同步程度
+    每个周期的同步度由出生日期差对周期取模后的相位差决定
+    """
+    day_a = np.datetime64(parse_date(birth_date_a), 'D')
+    day_b = np.datetime64(parse_date(birth_date_b), 'D')
+    days_apart = int((day_a - day_b).astype(np.int64))
+    
+    sync = get_biorhythm_table(CYCLES).gather_sync(days_apart)
+    result = {
+        "birth_dates": [str(day_a), str(day_b)],
+        "days_apart": abs(days_apart)
+    }
+    for name, value in sync.items():
+        result[name] = int(value)
+    result["overall"] = int(_overall_sync(sync))
+    return result
+
+def calculate_compatibility_matrix(birth_dates: List[str]) -> np.ndarray:
+    """
+    以一次广播计算得到N×N的综合同步度矩阵
+    
+    Returns:
+        np.ndarray: (N, N) int16矩阵，[i][j]为第i人与第j人的综合同步度
+    """
+    days = parse_date_array(birth_dates).astype(np.int64)
+    days_apart = days[:, np.newaxis] - days[np.newaxis, :]
+    return _overall_sync(get_biorhythm_table(CYCLES).gather_sync(days_apart))
+
+def find_top_compatible(birth_dates: List[str], top_k: int = 5) -> Dict[str, np.ndarray]:
+    """
+    找出每个人同步度最高的top_k个伙伴
+    按行分块计算，不生成完整的N×N矩阵
+    
+    Returns:
+        dict: "indices"和"scores"均为(N, k)数组，按同步度从高到低排列（同分按序号升序）
+    """
+    days = parse_date_array(birth_dates).astype(np.int64)
+    n = len(days)
+    k = max(0, min(top_k, n - 1))
+    table = get_biorhythm_table(CYCLES)
+    
+    indices = np.zeros((n, k), dtype=np.int64)
+    scores = np.zeros((n, k), dtype=np.int16)
+    if k == 0:
+        return {"indices": indices, "scores": scores}
+    
+    for start in range(0, n, COMPATIBILITY_CHUNK_ROWS):
+        stop = min(start + COMPATIBILITY_CHUNK_ROWS, n)
+        rows = np.arange(start, stop)
+        overall = _overall_sync(table.gather_sync(days[rows, np.newaxis] - days[np.newaxis, :]))
+        # 排序键：同步度优先，同分时序号小者优先；排除与自己的配对
+        keys = overall.astype(np.int64) * n + (n - 1 - np.arange(n))
+        keys[rows - start, rows] = -1
+        
+        # 先用argpartition取出前k个候选，再只对候选排序
+        candidates = np.argpartition(-keys, k - 1, axis=1)[:, :k]
+        order = np.argsort(-np.take_along_axis(keys, candidates, axis=1), axis=1)
+        top = np.take_along_axis(candidates, order, axis=1)
+        indices[start:stop] = top
+        scores[start:stop] = np.take_along_axis(overall, top, axis=1)
+    
+    return {"indices": indices, "scores": scores}
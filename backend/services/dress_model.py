@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+穿衣配置模型
+将配置文件中的五行、颜色系统、星期和饮食配置编译为整数编码的只读模型：
+五行、颜色系统均以下标表示，五行之间的关系预先计算为5×5关系矩阵，
+热点路径只做数组下标访问，不再逐次进行字符串键的嵌套字典查找
+"""
+
+import hashlib
+import json
+import os
+from typing import Any, Dict, NamedTuple, Tuple
+import numpy as np
+
+config_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config', 'app_config.json')
+
+# 模型使用的配置项，配置哈希只包含这些内容
+MODEL_SECTIONS = ["five_elements", "color_systems", "daily_food", "star_colors", "weekday_names"]
+
+# 五行关系：颜色系统五行相对于当日五行
+RELATION_NAMES = ["相同", "相生", "相克", "被克"]
+SAME, GENERATING, OVERCOMING, OVERCOME = range(len(RELATION_NAMES))
+
+class FiveElement(NamedTuple):
+    """五行（生、克、被克均为五行下标）"""
+    id: int
+    name: str
+    generates: int
+    overcomes: int
+    overcome_by: int
+    colors: Tuple[str, ...]
+
+class ColorSystem(NamedTuple):
+    """颜色系统（element为五行下标）"""
+    id: int
+    name: str
+    element: int
+    colors: Tuple[str, ...]
+    luck: str
+    description: str
+
+class DailyFood(NamedTuple):
+    """某个星期几的宜食、忌食食物"""
+    good: Tuple[str, ...]
+    bad: Tuple[str, ...]
+
+class DressConfigModel:
+    """编译后的穿衣配置模型（只读）"""
+
+    __slots__ = (
+        "elements", "color_systems", "weekday_names", "star_colors",
+        "daily_food", "relation_matrix", "color_relations", "config_hash"
+    )
+
+    def __init__(self, config: Dict[str, Any]):
+        element_ids = {name: i for i, name in enumerate(config["five_elements"])}
+        self.elements = tuple(
+            FiveElement(
+                id=element_ids[name],
+                name=name,
+                generates=element_ids[info["生"]],
+                overcomes=element_ids[info["克"]],
+                overcome_by=element_ids[info["被克"]],
+                colors=tuple(info["颜色"])
+            )
+            for name, info in config["five_elements"].items()
+        )
+
+        color_system_ids = {name: i for i, name in enumerate(config["color_systems"])}
+        self.color_systems = tuple(
+            ColorSystem(
+                id=color_system_ids[name],
+                name=name,
+                element=element_ids[info["五行"]],
+                colors=tuple(info["颜色"]),
+                luck=info["吉凶"],
+                description=info["描述"]
+            )
+            for name, info in config["color_systems"].items()
+        )
+
+        # 星期几（周一为0） -> 中文名称；星宿 -> 颜色系统下标
+        # 当日五行由日柱天干决定（utils/sexagenary.py），配置中的weekday_elements仅供Electron端使用
+        self.weekday_names = tuple(config["weekday_names"])
+        self.star_colors = np.array([color_system_ids[name] for name in config["star_colors"]], dtype=np.int64)
+        self.daily_food = tuple(
+            DailyFood(good=tuple(foods["宜"]), bad=tuple(foods["忌"]))
+            for foods in (config["daily_food"][str(weekday)] for weekday in range(7))
+        )
+
+        # (当日五行, 五行) -> 五行关系
+        count = len(self.elements)
+        self.relation_matrix = np.empty((count, count), dtype=np.int64)
+        for daily in self.elements:
+            for element in self.elements:
+                if element.id == daily.id:
+                    relation = SAME
+                elif daily.generates == element.id or element.generates == daily.id:
+                    relation = GENERATING
+                elif daily.overcomes == element.id:
+                    relation = OVERCOMING
+                else:
+                    relation = OVERCOME
+                self.relation_matrix[daily.id, element.id] = relation
+
+        # (当日五行, 颜色系统) -> 五行关系
+        self.color_relations = self.relation_matrix[:, [system.element for system in self.color_systems]]
+
+        sections = {section: config[section] for section in MODEL_SECTIONS}
+        encoded = json.dumps(sections, sort_keys=True, ensure_ascii=False).encode('utf-8')
+        self.config_hash = hashlib.sha256(encoded).hexdigest()
+
+def load_dress_model(path: str = config_path) -> DressConfigModel:
+    """从配置文件加载并编译穿衣配置模型"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return DressConfigModel(json.load(f))
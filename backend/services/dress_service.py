@@ -1,207 +1,390 @@
 import datetime
-import json
+import hashlib
 import os
-import pandas as pd
-import random
 import sys
-from typing import Dict, Any, List
+import tempfile
+import threading
+from typing import Dict, Any, List, Optional
+import numpy as np
 
 # 添加项目根目录到Python路径
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from utils.date_utils import parse_date, get_date_range
+from utils.compact_encoding import ReferenceTable
+from utils.deterministic import CounterRNG, stable_hash, counter_keys, counter_draws, draws_to_unit
+from utils.sexagenary import DAY_PILLAR_TABLE, STEM_ELEMENTS, day_pillar_index, day_pillar_arrays
+from services.dress_model import load_dress_model, RELATION_NAMES, SAME, GENERATING
 
-# 加载配置
-config_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config', 'app_config.json')
-with open(config_path, 'r', encoding='utf-8') as f:
-    config = json.load(f)
+# 加载并编译配置（五行、颜色系统等均为整数编码）
+DRESS_MODEL = load_dress_model()
 
-# 获取配置
-FIVE_ELEMENTS = config['five_elements']
-COLOR_SYSTEMS = config['color_systems']
-DAILY_FOOD = config['daily_food']
-WEEKDAY_ELEMENTS = config['weekday_elements']
-STAR_COLORS = config['star_colors']
-WEEKDAY_NAMES = config['weekday_names']
+ELEMENT_NAMES = [element.name for element in DRESS_MODEL.elements]
+COLOR_SYSTEM_NAMES = [system.name for system in DRESS_MODEL.color_systems]
+WEEKDAY_NAMES = DRESS_MODEL.weekday_names
+
+# 天干下标 -> 五行下标（当日五行取日柱天干的五行）
+DAY_STEM_ELEMENTS = [ELEMENT_NAMES.index(element) for element in STEM_ELEMENTS]
+
+# 日柱序号 -> 日柱信息（所有记录共享同一个字典对象）
+DAY_PILLAR_INFO = [
+    {
+        "干支": pillar.name,
+        "天干": pillar.stem,
+        "地支": pillar.branch,
+        "生肖": pillar.zodiac,
+        "纳音": pillar.nayin,
+        "纳音五行": pillar.nayin_element
+    }
+    for pillar in DAY_PILLAR_TABLE
+]
 
 def get_daily_five_element(date=None):
     """根据日期计算当日五行属性"""
-    date = parse_date(date)
-    
-    # 使用日期的多个因素来确定五行属性，使每天都有所不同
-    # 1. 使用星期几作为基础
-    weekday = date.weekday()
-    base_element = WEEKDAY_ELEMENTS[weekday]
-    
-    # 2. 使用日期的日、月、年的组合来调整
-    day = date.day
-    month = date.month
-    year = date.year
-    
-    # 使用日期的各个部分计算一个哈希值，用于确定五行
-    date_hash = (day * 100 + month * 10 + year % 10) % 5
-    
-    # 五行列表
-    elements = list(FIVE_ELEMENTS.keys())  # ['金', '木', '水', '火', '土']
-    
-    # 根据日期哈希值调整基础五行
-    # 如果哈希值为0，保持原有五行
-    # 否则，根据哈希值选择不同的五行
-    if date_hash != 0:
-        # 确保选择的五行与基础五行不同
-        available_elements = [e for e in elements if e != base_element]
-        # 使用哈希值选择一个五行
-        selected_index = (date_hash - 1) % len(available_elements)
-        return available_elements[selected_index]
-    
-    return base_element
+    return ELEMENT_NAMES[_daily_element_index(parse_date(date))]
 
-def get_daily_star_influence(date=None):
-    """计算当日星宿运行对穿衣颜色的影响"""
-    date = parse_date(date)
-    
-    # 使用日期的多个因素来确定星宿影响
-    day_of_year = date.timetuple().tm_yday  # 一年中的第几天
-    day = date.day
-    month = date.month
-    
+def _daily_element_index(date: datetime.date) -> int:
+    """当日五行下标：日柱天干的五行"""
+    return DAY_STEM_ELEMENTS[day_pillar_index(date.toordinal()) % 10]
+
+def _daily_star_index(date: datetime.date) -> int:
+    """当日星宿对应的颜色系统下标"""
     # 使用日期的不同组合来计算星宿索引
     # 这样可以确保不同日期有不同的星宿影响
-    star_index = (day_of_year + day * month) % len(STAR_COLORS)
-    
-    return STAR_COLORS[star_index]
+    day_of_year = date.timetuple().tm_yday  # 一年中的第几天
+    star_index = (day_of_year + date.day * date.month) % len(DRESS_MODEL.star_colors)
+    return int(DRESS_MODEL.star_colors[star_index])
+
+def get_daily_star_influence(date=None):
+    """计算当日星宿运行对穿衣颜色的影响"""
+    return COLOR_SYSTEM_NAMES[_daily_star_index(parse_date(date))]
+
+# 当日五行下标 -> 与之相同或相生的颜色系统名称（由关系矩阵预先得出）
+RECOMMENDED_COLOR_SYSTEMS = [
+    [COLOR_SYSTEM_NAMES[system_id] for system_id, relation in enumerate(relations) if relation in (SAME, GENERATING)]
+    for relations in DRESS_MODEL.color_relations.tolist()
+]
 
 def get_recommended_colors(date=None):
     """获取当日推荐穿衣颜色"""
-    daily_element = get_daily_five_element(date)
-    star_color = get_daily_star_influence(date)
+    date = parse_date(date)
     
     # 获取与当日五行相生或相同的颜色系统
-    recommended_colors = []
-    for color_system, info in COLOR_SYSTEMS.items():
-        element = info["五行"]
-        if (element == daily_element or 
-            FIVE_ELEMENTS[daily_element]["生"] == element or 
-            FIVE_ELEMENTS[element]["生"] == daily_element):
-            recommended_colors.append(color_system)
+    recommended_colors = list(RECOMMENDED_COLOR_SYSTEMS[_daily_element_index(date)])
     
     # 如果星宿颜色不在推荐列表中，也添加进去
+    star_color = COLOR_SYSTEM_NAMES[_daily_star_index(date)]
     if star_color not in recommended_colors:
         recommended_colors.append(star_color)
     
     return recommended_colors
 
+
+# ==================== 批量计算用的预计算表 ====================
+# 五行、颜色系统、五行关系和吉凶均编码为整数下标，日期窗口内的计算只做整数运算和查表
+
+EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+COLOR_SYSTEM_HASHES = np.array([stable_hash(name) for name in COLOR_SYSTEM_NAMES], dtype=np.int64)
+
+RELATION_LABELS = [f"与当日五行{relation}" for relation in RELATION_NAMES]
+LUCK_NAMES = ["吉", "中性", "不吉"]
+LUCKY, NEUTRAL, UNLUCKY = range(len(LUCK_NAMES))
+# 各五行关系（相同、相生、相克、被克）的基础吉凶
+RELATION_BASE_LUCK = np.array([LUCKY, LUCKY, NEUTRAL, UNLUCKY], dtype=np.int64)
+
+SCENE_WORDS = ['专注', '放松', '社交', '思考']
+EFFECT_WORDS = ['提升运势', '增强气场', '改善心情', '促进交流']
+
+def _dress_description(template: int, word: int, relation: str, luck: str) -> str:
+    """颜色建议的描述文本（template为模板下标0-4，word为场合/效果词下标0-3）"""
+    descriptions = [
+        f"于当日五行{relation}，{luck}相宜。今日若身着此类衣物配饰，有助于提升个人气场。",
+        f"今日五行{relation}，整体环境{luck}。此颜色系能够帮助你更好地适应今天的能量场。",
+        f"当日五行与此颜色{relation}，{luck}。穿着此类颜色有助于调和今日的能量。",
+        f"此颜色与今日五行{relation}，{luck}。适合需要{SCENE_WORDS[word]}的场合。",
+        f"今日此颜色{luck}，与当日五行{relation}。可以{EFFECT_WORDS[word]}。"
+    ]
+    return descriptions[template]
+
+# 描述文本表，下标为 ((模板 * 4 + 词) * 关系数 + 关系) * 吉凶数 + 吉凶
+DESCRIPTION_TABLE = [
+    _dress_description(template, word, relation, luck)
+    for template in range(5)
+    for word in range(4)
+    for relation in RELATION_NAMES
+    for luck in LUCK_NAMES
+]
+
+# 每个星期几的饮食基础建议（各保留前两个）以及可供随机补充的其余食物（保持配置中的首次出现顺序）
+ALL_GOOD_FOODS = list(dict.fromkeys(food for day_foods in DRESS_MODEL.daily_food for food in day_foods.good))
+ALL_BAD_FOODS = list(dict.fromkeys(food for day_foods in DRESS_MODEL.daily_food for food in day_foods.bad))
+FOOD_TABLE = []
+for _day_foods in DRESS_MODEL.daily_food:
+    _good_base = list(_day_foods.good[:2])
+    _bad_base = list(_day_foods.bad[:2])
+    FOOD_TABLE.append((
+        _good_base,
+        _bad_base,
+        [food for food in ALL_GOOD_FOODS if food not in _good_base],
+        [food for food in ALL_BAD_FOODS if food not in _bad_base]
+    ))
+
+# 每个星期几可供补充的食物数量（至少为1，避免取模为零；列表为空时不补充）
+FOOD_CHOICE_COUNTS = np.array([
+    [max(len(remaining_good), 1), max(len(remaining_bad), 1)]
+    for _, _, remaining_good, remaining_bad in FOOD_TABLE
+], dtype=np.uint64)
+
+def _food_suggestions(weekday: int, good_pick: int, bad_pick: int) -> Dict[str, List[str]]:
+    """由星期几和补充食物的下标生成饮食建议：基础建议加一个随机补充的食物"""
+    good_base, bad_base, remaining_good, remaining_bad = FOOD_TABLE[weekday]
+    good_foods = list(good_base)
+    bad_foods = list(bad_base)
+    if remaining_good:
+        good_foods.append(remaining_good[good_pick])
+    if remaining_bad:
+        bad_foods.append(remaining_bad[bad_pick])
+    return {
+        "宜": good_foods,
+        "忌": bad_foods
+    }
+
 def get_daily_food_suggestions(date=None):
     """获取当日饮食建议"""
     date = parse_date(date)
     
-    # 基础食物建议基于星期几
-    weekday = date.weekday()
-    base_suggestions = DAILY_FOOD[str(weekday)]
+    # 以日期为键的计数器随机数，确保同一天生成的结果一致（宜、忌各取一个值）
+    rng = CounterRNG(date.toordinal(), "food")
+    good_draw = rng.next_u64()
+    bad_draw = rng.next_u64()
     
-    # 使用日期的日、月来调整食物建议，使每天都有所不同
-    day = date.day
-    month = date.month
+    # 基础食物建议基于星期几，再添加随机选择的宜食和忌食食物
+    weekday = date.weekday()
+    good_count, bad_count = FOOD_CHOICE_COUNTS[weekday].tolist()
+    return _food_suggestions(weekday, good_draw % good_count, bad_draw % bad_count)
+
+def calculate_dress_window(start_date, end_date) -> Dict[str, np.ndarray]:
+    """
+    一次性计算日期窗口内每天的穿衣数值（列式结果）
     
-    # 所有可能的宜食食物和忌食食物
-    all_good_foods = []
-    all_bad_foods = []
+    Returns:
+        dict: 日期、星期、日柱序号、当日五行、星宿颜色，以及（天数, 颜色系统数）的五行关系、吉凶和描述下标，
+              随机补充的宜食/忌食食物下标
+    """
+    start_day = np.datetime64(parse_date(start_date), 'D')
+    end_day = np.datetime64(parse_date(end_date), 'D')
+    dates = np.arange(start_day, end_day + 1, dtype='datetime64[D]')
+    ordinals = dates.astype(np.int64) + EPOCH_ORDINAL
+    weekdays = (ordinals + 6) % 7
     
-    for day_foods in DAILY_FOOD.values():
-        all_good_foods.extend(day_foods["宜"])
-        all_bad_foods.extend(day_foods["忌"])
+    # 公历月、日以及一年中的第几天
+    year_starts = dates.astype('datetime64[Y]')
+    month_starts = dates.astype('datetime64[M]')
+    months = month_starts.astype(np.int64) % 12 + 1
+    days = (dates - month_starts).astype(np.int64) + 1
+    day_of_year = (dates - year_starts).astype(np.int64) + 1
     
-    # 去重
-    all_good_foods = list(set(all_good_foods))
-    all_bad_foods = list(set(all_bad_foods))
+    # 日柱，当日五行（日柱天干的五行）及与各颜色系统的关系
+    pillars = day_pillar_arrays(dates)
+    elements = np.array(DAY_STEM_ELEMENTS, dtype=np.int64)[pillars["stem"]]
+    relations = DRESS_MODEL.color_relations[elements]
     
-    # 使用日期生成随机种子，确保同一天生成的结果一致
-    random.seed(day + month * 100 + date.year * 10000)
+    # 每个（日期, 颜色系统）取四个值：反转判断、反转方向、场合/效果词、描述模板
+    draws = counter_draws(counter_keys(ordinals[:, np.newaxis], COLOR_SYSTEM_HASHES), 4)
+    flipped = draws_to_unit(draws[..., 0]) < 0.1
+    heads = draws_to_unit(draws[..., 1]) < 0.5
+    words = (draws[..., 2] % np.uint64(4)).astype(np.int64)
+    templates = (draws[..., 3] % np.uint64(5)).astype(np.int64)
     
-    # 从基础建议中保留一部分，并添加一些随机选择的食物
-    good_foods = base_suggestions["宜"][:2]  # 保留前两个
-    bad_foods = base_suggestions["忌"][:2]   # 保留前两个
+    # 有10%的概率反转吉凶判断：吉/不吉变为中性，中性随机变为吉或不吉
+    base_luck = RELATION_BASE_LUCK[relations]
+    flipped_luck = np.where(base_luck == NEUTRAL, np.where(heads, LUCKY, UNLUCKY), NEUTRAL)
+    lucks = np.where(flipped, flipped_luck, base_luck)
     
-    # 添加一个随机选择的宜食食物
-    remaining_good = [f for f in all_good_foods if f not in good_foods]
-    if remaining_good:
-        good_foods.append(random.choice(remaining_good))
+    descriptions = ((templates * 4 + words) * len(RELATION_NAMES) + relations) * len(LUCK_NAMES) + lucks
     
-    # 添加一个随机选择的忌食食物
-    remaining_bad = [f for f in all_bad_foods if f not in bad_foods]
-    if remaining_bad:
-        bad_foods.append(random.choice(remaining_bad))
+    # 饮食建议：宜、忌各取一个值，对当天星期几可选的食物数量取模
+    food_picks = counter_draws(counter_keys(ordinals, "food"), 2) % FOOD_CHOICE_COUNTS[weekdays]
     
     return {
-        "宜": good_foods,
-        "忌": bad_foods
+        "dates": dates,
+        "weekdays": weekdays,
+        "pillars": pillars["index"],
+        "elements": elements,
+        "stars": DRESS_MODEL.star_colors[(day_of_year + days * months) % len(DRESS_MODEL.star_colors)],
+        "relations": relations,
+        "lucks": lucks,
+        "descriptions": descriptions,
+        "good_foods": food_picks[:, 0].astype(np.int64),
+        "bad_foods": food_picks[:, 1].astype(np.int64)
     }
 
+# 各颜色系统的具体颜色（所有记录共享同一个列表对象）
+COLOR_DETAILS = [list(system.colors) for system in DRESS_MODEL.color_systems]
+
+def _dress_window_records(window: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+    """将窗口的列式结果转换为逐日记录"""
+    color_details = COLOR_DETAILS
+    records = []
+    for date_str, weekday, pillar, element, relations, lucks, descriptions, good_food, bad_food in zip(
+        np.datetime_as_string(window["dates"]).tolist(),
+        window["weekdays"].tolist(),
+        window["pillars"].tolist(),
+        window["elements"].tolist(),
+        window["relations"].tolist(),
+        window["lucks"].tolist(),
+        window["descriptions"].tolist(),
+        window["good_foods"].tolist(),
+        window["bad_foods"].tolist()
+    ):
+        records.append({
+            "date": date_str,
+            "weekday": WEEKDAY_NAMES[weekday],
+            "daily_element": ELEMENT_NAMES[element],
+            "day_pillar": DAY_PILLAR_INFO[pillar],
+            "color_suggestions": [
+                {
+                    "颜色系统": name,
+                    "具体颜色": colors,
+                    "五行关系": RELATION_LABELS[relation],
+                    "吉凶": LUCK_NAMES[luck],
+                    "描述": DESCRIPTION_TABLE[description]
+                }
+                for name, colors, relation, luck, description in zip(
+                    COLOR_SYSTEM_NAMES, color_details, relations, lucks, descriptions
+                )
+            ],
+            "food_suggestions": _food_suggestions(weekday, good_food, bad_food)
+        })
+    return records
+
+# ==================== 编译的穿衣日历 ====================
+# 穿衣结果只取决于日期和配置中的静态表，预先计算1900-2100年每天的结果并保存为.npy文件，
+# 启动后以内存映射方式加载，/dress/*接口只做查表；配置内容或算法版本变化时自动重新编译
+
+DRESS_CALENDAR_START = datetime.date(1900, 1, 1)
+DRESS_CALENDAR_END = datetime.date(2100, 12, 31)
+# 修改calculate_dress_window的计算逻辑时需要递增，使旧的日历文件失效
+DRESS_ALGORITHM_VERSION = 3
+
+DRESS_CALENDAR_DIR = os.getenv(
+    "DRESS_CALENDAR_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+)
+
+_COLOR_SYSTEM_COUNT = len(COLOR_SYSTEM_NAMES)
+DRESS_CALENDAR_DTYPE = np.dtype([
+    ("weekday", np.uint8),
+    ("pillar", np.uint8),
+    ("element", np.uint8),
+    ("star", np.uint8),
+    ("good_food", np.uint16),
+    ("bad_food", np.uint16),
+    ("relations", np.uint8, (_COLOR_SYSTEM_COUNT,)),
+    ("lucks", np.uint8, (_COLOR_SYSTEM_COUNT,)),
+    ("descriptions", np.uint16, (_COLOR_SYSTEM_COUNT,))
+])
+
+# 日历字段 -> 窗口列名
+_CALENDAR_COLUMNS = {
+    "weekday": "weekdays",
+    "pillar": "pillars",
+    "element": "elements",
+    "star": "stars",
+    "good_food": "good_foods",
+    "bad_food": "bad_foods",
+    "relations": "relations",
+    "lucks": "lucks",
+    "descriptions": "descriptions"
+}
+
+_dress_calendar: Optional[np.ndarray] = None
+_dress_calendar_lock = threading.Lock()
+
+def _dress_calendar_key() -> str:
+    """日历版本键：配置模型哈希、算法版本和日历范围的哈希"""
+    source = f"{DRESS_MODEL.config_hash}:{DRESS_ALGORITHM_VERSION}:{DRESS_CALENDAR_START}:{DRESS_CALENDAR_END}"
+    return hashlib.sha256(source.encode('utf-8')).hexdigest()[:16]
+
+def compile_dress_calendar() -> np.ndarray:
+    """计算整个日历范围内每天的穿衣数值，返回结构化数组（每天一行）"""
+    window = calculate_dress_window(DRESS_CALENDAR_START, DRESS_CALENDAR_END)
+    calendar = np.empty(len(window["dates"]), dtype=DRESS_CALENDAR_DTYPE)
+    for field, column in _CALENDAR_COLUMNS.items():
+        calendar[field] = window[column]
+    return calendar
+
+def _save_dress_calendar(calendar: np.ndarray, path: str) -> None:
+    """原子地写入日历文件（先写临时文件再替换），并删除旧版本的日历文件"""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.save(f, calendar, allow_pickle=False)
+        os.replace(temp_path, path)
+    except OSError:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    for name in os.listdir(directory):
+        if name.startswith("dress_calendar_") and name.endswith(".npy") and name != os.path.basename(path):
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass
+
+def get_dress_calendar() -> np.ndarray:
+    """
+    获取编译的穿衣日历（首次调用时加载）
+    日历文件不存在、已损坏或与当前配置不匹配时重新编译；目录不可写时只保留在内存中
+    """
+    global _dress_calendar
+    if _dress_calendar is not None:
+        return _dress_calendar
+
+    with _dress_calendar_lock:
+        if _dress_calendar is None:
+            path = os.path.join(DRESS_CALENDAR_DIR, f"dress_calendar_{_dress_calendar_key()}.npy")
+            expected_rows = (DRESS_CALENDAR_END - DRESS_CALENDAR_START).days + 1
+            try:
+                calendar = np.load(path, mmap_mode='r', allow_pickle=False)
+                if calendar.dtype != DRESS_CALENDAR_DTYPE or calendar.shape != (expected_rows,):
+                    raise ValueError("日历文件结构不匹配")
+            except (OSError, ValueError):
+                calendar = compile_dress_calendar()
+                try:
+                    _save_dress_calendar(calendar, path)
+                    calendar = np.load(path, mmap_mode='r', allow_pickle=False)
+                except OSError as e:
+                    print(f"穿衣日历写入失败，使用内存中的日历: {e}")
+            _dress_calendar = calendar
+    return _dress_calendar
+
+def get_dress_window(start_date, end_date) -> Dict[str, np.ndarray]:
+    """
+    获取日期窗口的穿衣数值（列同calculate_dress_window）
+    窗口在日历范围内时直接切片查表，否则现场计算
+    """
+    start_date = parse_date(start_date)
+    end_date = parse_date(end_date)
+    if not (DRESS_CALENDAR_START <= start_date and end_date <= DRESS_CALENDAR_END):
+        return calculate_dress_window(start_date, end_date)
+
+    offset = (start_date - DRESS_CALENDAR_START).days
+    rows = get_dress_calendar()[offset:offset + (end_date - start_date).days + 1]
+    # 复制为连续的普通数组（结构化内存映射的字段视图逐元素转换很慢）
+    window = {column: np.ascontiguousarray(rows[field]) for field, column in _CALENDAR_COLUMNS.items()}
+    window["dates"] = np.arange(
+        np.datetime64(start_date, 'D'), np.datetime64(end_date, 'D') + 1, dtype='datetime64[D]'
+    )
+    return window
+
 def get_dress_info_for_date(date=None):
     """获取指定日期的穿衣与饮食建议"""
     date = parse_date(date)
-    daily_element = get_daily_five_element(date)
-    
-    # 获取颜色建议
-    color_suggestions = []
-    for color_system, info in COLOR_SYSTEMS.items():
-        element = info["五行"]
-        relation = "相同" if element == daily_element else (
-            "相生" if FIVE_ELEMENTS[daily_element]["生"] == element or FIVE_ELEMENTS[element]["生"] == daily_element else (
-            "相克" if FIVE_ELEMENTS[daily_element]["克"] == element else "被克"
-            )
-        )
-        
-        # 根据日期调整吉凶判断，使每天的建议更加多样化
-        day = date.day
-        month = date.month
-        
-        # 使用日期生成随机种子，确保同一天生成的结果一致
-        random.seed(day + month * 100 + date.year * 10000 + hash(color_system))
-        
-        # 基于五行关系的基础吉凶判断
-        base_luck = "吉" if relation in ["相同", "相生"] else ("不吉" if relation == "被克" else "中性")
-        
-        # 有10%的概率反转吉凶判断，增加变化性
-        luck = base_luck
-        if random.random() < 0.1:
-            if base_luck == "吉":
-                luck = "中性"
-            elif base_luck == "不吉":
-                luck = "中性"
-            elif base_luck == "中性":
-                luck = "吉" if random.random() < 0.5 else "不吉"
-        
-        # 根据日期调整描述，使每天的建议更加多样化
-        descriptions = [
-            f"于当日五行{relation}，{luck}相宜。今日若身着此类衣物配饰，有助于提升个人气场。",
-            f"今日五行{relation}，整体环境{luck}。此颜色系能够帮助你更好地适应今天的能量场。",
-            f"当日五行与此颜色{relation}，{luck}。穿着此类颜色有助于调和今日的能量。",
-            f"此颜色与今日五行{relation}，{luck}。适合需要{random.choice(['专注', '放松', '社交', '思考'])}的场合。",
-            f"今日此颜色{luck}，与当日五行{relation}。可以{random.choice(['提升运势', '增强气场', '改善心情', '促进交流'])}。"
-        ]
-        
-        # 随机选择一个描述
-        selected_description = random.choice(descriptions)
-        
-        suggestion = {
-            "颜色系统": color_system,
-            "具体颜色": info["颜色"],
-            "五行关系": f"与当日五行{relation}",
-            "吉凶": luck,
-            "描述": selected_description
-        }
-        color_suggestions.append(suggestion)
-    
-    # 获取饮食建议
-    food_suggestions = get_daily_food_suggestions(date)
-    
-    return {
-        "date": date.strftime("%Y-%m-%d"),
-        "weekday": WEEKDAY_NAMES[date.weekday()],
-        "daily_element": daily_element,
-        "color_suggestions": color_suggestions,
-        "food_suggestions": food_suggestions
-    }
+    return _dress_window_records(get_dress_window(date, date))[0]
 
 def get_today_dress_info():
     """获取今日穿衣颜色和饮食建议"""
@@ -211,29 +394,49 @@ def get_date_dress_info(date: str):
     """获取指定日期的穿衣颜色和饮食建议"""
     return get_dress_info_for_date(date)
 
-def get_dress_info_range(days_before: int, days_after: int):
-    """获取一段时间内的穿衣颜色和饮食建议"""
+def compact_dress_info_list(dress_info_list: List[Dict[str, Any]], table: ReferenceTable) -> List[Dict[str, Any]]:
+    """
+    紧凑模式：日柱信息（按干支去重）以及颜色建议中的"具体颜色"（按颜色系统去重）和"描述"（按文本去重）
+    替换为字典下标
+    """
+    compacted = []
+    for dress_info in dress_info_list:
+        item = dict(dress_info)
+        item["day_pillar"] = table.ref("day_pillar", dress_info["day_pillar"]["干支"], dress_info["day_pillar"])
+        item["color_suggestions"] = [
+            dict(
+                suggestion,
+                具体颜色=table.ref("具体颜色", suggestion["颜色系统"], suggestion["具体颜色"]),
+                描述=table.ref("描述", suggestion["描述"], suggestion["描述"])
+            )
+            for suggestion in dress_info["color_suggestions"]
+        ]
+        compacted.append(item)
+    return compacted
+
+def get_dress_info_range(days_before: int, days_after: int, compact: bool = False):
+    """
+    获取一段时间内的穿衣颜色和饮食建议
+    compact为True时重复的日柱信息、颜色列表和描述文本放入"dictionary"，记录中为字典下标
+    """
     current_date = datetime.datetime.now().date()
     
     # 计算日期范围
     start_date, end_date = get_date_range(current_date, days_before, days_after)
     
-    # 创建日期范围
-    date_range = pd.date_range(start=start_date, end=end_date)
+    # 整个窗口一次性批量计算
+    dress_info_list = _dress_window_records(get_dress_window(start_date, end_date))
     
-    # 初始化结果数组
-    dress_info_list = []
-    
-    # 计算每一天的穿衣信息
-    for date in date_range:
-        date_obj = date.date()  # 转换为date对象，避免时区问题
-        dress_info = get_dress_info_for_date(date_obj)
-        dress_info_list.append(dress_info)
-    
-    return {
+    result = {
         "date_range": {
             "start": start_date.strftime("%Y-%m-%d"),
             "end": end_date.strftime("%Y-%m-%d")
         },
         "dress_info_list": dress_info_list
-    }
\ No newline at end of file
+    }
+    if compact:
+        table = ReferenceTable()
+        result["dress_info_list"] = compact_dress_info_list(dress_info_list, table)
+        result["dictionary"] = table.tables
+        result["compact"] = True
+    return result
\ No newline at end of file
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+生活指南规则引擎
+将配置文件中的life_guide_rules编译为规则表（周期、阈值、建议、类别），
+对整个日期窗口以向量化掩码一次性求值
+"""
+
+import hashlib
+import json
+import os
+from typing import Dict, Any, List, Optional
+import numpy as np
+
+config_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config', 'app_config.json')
+
+# 规则可引用的数据序列，total为三个周期之和
+RULE_SERIES = ["physical", "emotional", "intellectual", "total"]
+
+class CompiledRuleTable:
+    """
+    编译后的规则表
+
+    每条规则形如 {"category": "diet", "series": "physical", "gt": 50, "message": "..."}，
+    阈值条件gt/ge/lt/le可任意组合，同时满足时规则命中
+    """
+
+    def __init__(self, rules: List[Dict[str, Any]]):
+        self.rules = rules
+        self.messages = [rule["message"] for rule in rules]
+        self.categories = list(dict.fromkeys(rule["category"] for rule in rules))
+
+        category_ids = {category: i for i, category in enumerate(self.categories)}
+        self.category_index = np.array([category_ids[rule["category"]] for rule in rules], dtype=np.int64)
+        self.series_index = np.array([RULE_SERIES.index(rule["series"]) for rule in rules], dtype=np.int64)
+
+        # 下界/上界（无限制时为±inf）及是否包含边界
+        self.lower = np.array([rule.get("ge", rule.get("gt", -np.inf)) for rule in rules], dtype=np.float64)
+        self.lower_inclusive = np.array(["ge" in rule for rule in rules], dtype=bool)
+        self.upper = np.array([rule.get("le", rule.get("lt", np.inf)) for rule in rules], dtype=np.float64)
+        self.upper_inclusive = np.array(["le" in rule for rule in rules], dtype=bool)
+
+    def evaluate(self, series: Dict[str, np.ndarray]) -> np.ndarray:
+        """
+        对整个窗口求值
+
+        Args:
+            series: physical/emotional/intellectual三个等长数组，total可省略
+
+        Returns:
+            np.ndarray: (规则数, 天数)的布尔掩码
+        """
+        if "total" not in series:
+            series = dict(series, total=(
+                series["physical"].astype(np.int32) + series["emotional"] + series["intellectual"]
+            ))
+        values = np.stack([np.asarray(series[name], dtype=np.float64) for name in RULE_SERIES])[self.series_index]
+
+        lower = self.lower[:, np.newaxis]
+        upper = self.upper[:, np.newaxis]
+        above = (values > lower) | (self.lower_inclusive[:, np.newaxis] & (values == lower))
+        below = (values < upper) | (self.upper_inclusive[:, np.newaxis] & (values == upper))
+        return above & below
+
+    def recommendations(self, series: Dict[str, np.ndarray]) -> List[Dict[str, List[str]]]:
+        """
+        计算窗口内每一天各类别命中的建议（保持规则表中的顺序）
+
+        Returns:
+            list: 每天一个 {类别: [建议, ...]} 字典
+        """
+        mask = self.evaluate(series)
+        days = mask.shape[1]
+        result = [{category: [] for category in self.categories} for _ in range(days)]
+
+        # 转置后按（天, 规则）顺序遍历命中项
+        day_ids, rule_ids = np.nonzero(mask.T)
+        for day, rule in zip(day_ids.tolist(), rule_ids.tolist()):
+            result[day][self.categories[self.category_index[rule]]].append(self.messages[rule])
+        return result
+
+# 编译结果缓存：配置文件修改时间与规则内容哈希
+_compiled_table: Optional[CompiledRuleTable] = None
+_rules_hash: Optional[str] = None
+_config_mtime: Optional[float] = None
+
+def get_rule_table() -> CompiledRuleTable:
+    """获取编译后的规则表，配置中的规则发生变化时重新编译"""
+    global _compiled_table, _rules_hash, _config_mtime
+
+    mtime = os.path.getmtime(config_path)
+    if _compiled_table is not None and mtime == _config_mtime:
+        return _compiled_table
+
+    with open(config_path, 'r', encoding='utf-8') as f:
+        rules = json.load(f).get('life_guide_rules', [])
+    _config_mtime = mtime
+
+    rules_hash = hashlib.sha256(json.dumps(rules, sort_keys=True).encode('utf-8')).hexdigest()
+    if _compiled_table is None or rules_hash != _rules_hash:
+        _compiled_table = CompiledRuleTable(rules)
+        _rules_hash = rules_hash
+    return _compiled_table
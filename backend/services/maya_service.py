@@ -1,16 +1,22 @@
 from datetime import datetime, timedelta, date
 import random
 import math
-from typing import List, Dict, Any, Tuple, Optional
-from utils.date_utils import normalize_date_string, parse_date, get_date_str, get_weekday
+from functools import cached_property, lru_cache
+from typing import List, Dict, Any, Iterator, NamedTuple, Tuple, Optional
+import numpy as np
+from utils.date_utils import normalize_date_string, parse_date, get_date_str, get_weekday, get_date_range, parse_date_array
+from utils.history_store import history_store, DEFAULT_CLIENT_ID
+from utils.deterministic import stable_hash
+from utils.compact_encoding import ReferenceTable, compact_records
 from config.maya_config import (
     MAYA_SEAL_LIST, MAYA_SEALS, MAYA_TONE_LIST, MAYA_TONES, 
     MAYA_MONTHS, SUGGESTIONS, LUCKY_ITEMS, DAILY_QUOTES, 
-    DAILY_MESSAGES, MAYA_KEY_DATES, ENERGY_FIELDS
+    DAILY_MESSAGES, MAYA_KEY_DATES, ENERGY_FIELDS,
+    THIRTEEN_MOON_YEAR_START, THIRTEEN_MOON_MONTH_DAYS, DAY_OUT_OF_TIME_NAME, HUNAB_KU_NAME
 )
 
-# 存储用户历史查询的出生日期
-maya_history_dates = []
+# 历史记录类别
+MAYA_HISTORY_NAMESPACE = "maya"
 # 最大历史记录数量
 MAX_MAYA_HISTORY = 6
 
@@ -19,77 +25,184 @@ MAYA_TZOLKIN_CYCLE = 260  # 玛雅神圣历周期（260天）
 MAYA_HAAB_CYCLE = 365     # 玛雅太阳历周期（365天）
 MAYA_CALENDAR_ROUND = 18980  # 玛雅历轮回（52年）
 
+# 范围查询最多包含的天数（一个完整的历轮回）
+MAX_MAYA_RANGE_DAYS = MAYA_CALENDAR_ROUND
+# 批量/流式输出时每块包含的天数
+MAYA_STREAM_CHUNK_DAYS = 366
+
+# 1970-01-01（datetime64的纪元）对应的日期序号
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
 # 玛雅历法参考点（与前端保持一致）
 MAYA_REFERENCE_DATE = datetime(2025, 9, 23)  # 2025年9月23日 = 磁性的蓝夜
 MAYA_REFERENCE_TONE_INDEX = 0  # 磁性
 MAYA_REFERENCE_SEAL_INDEX = 2  # 蓝夜
+MAYA_REFERENCE_KIN = 183  # 参考日期对应的KIN码
+MAYA_REFERENCE_ORDINAL = MAYA_REFERENCE_DATE.toordinal()
 
-def calculate_maya_date_info(date_obj: datetime) -> Dict[str, Any]:
+class TzolkinEntry(NamedTuple):
+    """卓尔金历中某个KIN的全部静态信息（只与KIN有关，与具体日期无关）"""
+    kin: int
+    tone_index: int
+    seal_index: int
+    tone_name: str
+    seal_name: str
+    full_name: str
+    tone_details: Dict[str, str]
+    seal_details: Dict[str, str]
+
+def _build_tzolkin_table() -> Tuple[TzolkinEntry, ...]:
+    """构建260个KIN的只读查找表（模块导入时构建一次）"""
+    entries = []
+    for kin in range(1, MAYA_TZOLKIN_CYCLE + 1):
+        tone_index = (kin - 1) % 13
+        seal_index = (kin - 1) % 20
+        tone_name = MAYA_TONE_LIST[tone_index]
+        seal_name = MAYA_SEAL_LIST[seal_index]
+        entries.append(TzolkinEntry(
+            kin=kin,
+            tone_index=tone_index,
+            seal_index=seal_index,
+            tone_name=tone_name,
+            seal_name=seal_name,
+            full_name=f"{tone_name}的{seal_name}",
+            tone_details=MAYA_TONES[tone_name],
+            seal_details=MAYA_SEALS[seal_name]
+        ))
+    return tuple(entries)
+
+# 卓尔金历查找表，下标为 KIN - 1
+TZOLKIN_TABLE = _build_tzolkin_table()
+
+def get_tzolkin_entry(kin: int) -> TzolkinEntry:
+    """根据KIN码（1-260）获取卓尔金历条目"""
+    return TZOLKIN_TABLE[(kin - 1) % MAYA_TZOLKIN_CYCLE]
+
+# ==================== 神谕关系（引导、类比、对立、隐藏） ====================
+
+# 引导图腾相对于本图腾的偏移，按调性（从0开始的索引）决定：
+# 调性1/6/11为本图腾，2/7/12为+12，3/8/13为+4，4/9为+16，5/10为+8
+GUIDE_SEAL_OFFSETS = [0, 12, 4, 16, 8, 0, 12, 4, 16, 8, 0, 12, 4]
+
+def _kin_from_indices(tone_index, seal_index):
     """
-    计算给定日期的玛雅历法信息（基于KIN 183校准）
-    返回KIN码、调性和图腾信息
+    由调性索引（0-12）和图腾索引（0-19）求KIN码（中国剩余定理）
+    40 ≡ 1 (mod 13) 且 ≡ 0 (mod 20)；221 ≡ 0 (mod 13) 且 ≡ 1 (mod 20)
     """
-    # 13种调性（银河音调）
-    TONES = [
-        '磁性', '月亮', '电力', '自我存在', '超频', '韵律', '共振',
-        '银河', '太阳', '行星', '光谱', '水晶', '宇宙'
-    ]
-    
-    # 20种图腾（太阳印记）
-    SEALS = [
-        '红龙', '白风', '蓝夜', '黄种子', '红蛇', '白世界桥', '蓝手', '黄星星',
-        '红月', '白狗', '蓝猴', '黄人', '红天行者', '白巫师', '蓝鹰', '黄战士',
-        '红地球', '白镜', '蓝风暴', '黄太阳'
-    ]
-    
-    # 使用已知正确的参考点：2025年9月23日 = KIN 183 磁性的蓝夜
-    REFERENCE_KIN = 183
-    
-    # 计算从参考日期到目标日期的天数
-    days_diff = (date_obj - MAYA_REFERENCE_DATE).days
+    return (40 * tone_index + 221 * seal_index) % MAYA_TZOLKIN_CYCLE + 1
+
+def _build_oracle_arrays() -> Dict[str, np.ndarray]:
+    """预计算260个KIN码的神谕关系，数组下标为 KIN - 1"""
+    kins = np.arange(1, MAYA_TZOLKIN_CYCLE + 1)
+    tone_index = (kins - 1) % 13
+    seal_index = (kins - 1) % 20
+    arrays = {
+        # 引导：同调性，图腾按调性偏移
+        "guide": _kin_from_indices(tone_index, (seal_index + np.take(GUIDE_SEAL_OFFSETS, tone_index)) % 20),
+        # 类比：同调性，图腾编号之和为19（索引之和为17）
+        "analog": _kin_from_indices(tone_index, (17 - seal_index) % 20),
+        # 对立：同调性，图腾相差10
+        "antipode": _kin_from_indices(tone_index, (seal_index + 10) % 20),
+        # 隐藏：KIN码之和为261（调性编号之和为14，图腾编号之和为21）
+        "occult": MAYA_TZOLKIN_CYCLE + 1 - kins,
+        # 所在波符（1-20）及其起始KIN码
+        "wavespell": (kins - 1) // 13 + 1,
+        "wavespell_kin": (kins - 1) // 13 * 13 + 1
+    }
+    for values in arrays.values():
+        values.setflags(write=False)
+    return arrays
+
+# 神谕关系查找表（列式），下标为 KIN - 1
+ORACLE_ARRAYS = _build_oracle_arrays()
+ORACLE_RELATIONS = ["guide", "analog", "antipode", "occult"]
+
+def _build_oracle_table() -> Tuple[Dict[str, Any], ...]:
+    """预先组装每个KIN码的神谕信息字典"""
+    def describe(kin: int) -> Dict[str, Any]:
+        entry = TZOLKIN_TABLE[kin - 1]
+        return {
+            "kin": kin,
+            "tone": entry.tone_name,
+            "seal": entry.seal_name,
+            "full_name": entry.full_name
+        }
     
-    # 计算KIN数（1-260的循环）
-    kin = REFERENCE_KIN + days_diff
-    kin = ((kin - 1) % 260) + 1
+    table = []
+    for i in range(MAYA_TZOLKIN_CYCLE):
+        oracle = {relation: describe(int(ORACLE_ARRAYS[relation][i])) for relation in ORACLE_RELATIONS}
+        wavespell_entry = TZOLKIN_TABLE[int(ORACLE_ARRAYS["wavespell_kin"][i]) - 1]
+        oracle["wavespell"] = {
+            "number": int(ORACLE_ARRAYS["wavespell"][i]),
+            "position": TZOLKIN_TABLE[i].tone_index + 1,
+            "seal": wavespell_entry.seal_name,
+            "name": f"{wavespell_entry.seal_name}波符"
+        }
+        table.append(oracle)
+    return tuple(table)
+
+# 神谕信息查找表，下标为 KIN - 1
+ORACLE_TABLE = _build_oracle_table()
+
+def get_maya_oracle(kin: int) -> Dict[str, Any]:
+    """O(1)获取KIN码的神谕关系（引导、类比、对立、隐藏及波符位置），返回共享对象，调用方不应修改"""
+    return ORACLE_TABLE[(kin - 1) % MAYA_TZOLKIN_CYCLE]
+
+def get_maya_oracle_batch(kins) -> Dict[str, np.ndarray]:
+    """
+    批量获取多个KIN码的神谕关系（列式）
     
-    # 从KIN数计算调性和图腾
-    tone_index = (kin - 1) % 13
-    seal_index = (kin - 1) % 20
+    Args:
+        kins: KIN码数组（1-260）
     
-    tone_name = TONES[tone_index]
-    seal_name = SEALS[seal_index]
+    Returns:
+        dict: "kin"以及各关系的KIN码、"wavespell"波符编号，均为与输入等长的数组
     
+    Raises:
+        ValueError: KIN码超出范围
+    """
+    kins = np.asarray(kins, dtype=np.int64)
+    if kins.size and (kins.min() < 1 or kins.max() > MAYA_TZOLKIN_CYCLE):
+        raise ValueError(f"KIN码必须在1-{MAYA_TZOLKIN_CYCLE}之间")
+    index = kins - 1
+    result = {"kin": kins}
+    result.update({relation: ORACLE_ARRAYS[relation][index] for relation in ORACLE_RELATIONS + ["wavespell"]})
+    return result
+
+def calculate_kin_from_ordinal(ordinal):
+    """根据日期序号（date.toordinal()）计算KIN码，也可传入序号的NumPy数组"""
+    return (ordinal - MAYA_REFERENCE_ORDINAL + MAYA_REFERENCE_KIN - 1) % MAYA_TZOLKIN_CYCLE + 1
+
+def calculate_maya_date_info(date_obj: datetime) -> Dict[str, Any]:
+    """
+    计算给定日期的玛雅历法信息（基于KIN 183校准）
+    返回KIN码、调性和图腾信息
+    """
+    entry = TZOLKIN_TABLE[calculate_kin_from_ordinal(date_obj.toordinal()) - 1]
     return {
-        "kin": kin,
-        "tone_name": tone_name,
-        "seal_name": seal_name,
-        "tone_index": tone_index,
-        "seal_index": seal_index,
-        "full_name": f"{tone_name}的{seal_name}"
+        "kin": entry.kin,
+        "tone_name": entry.tone_name,
+        "seal_name": entry.seal_name,
+        "tone_index": entry.tone_index,
+        "seal_index": entry.seal_index,
+        "full_name": entry.full_name
     }
 
 def calculate_kin_number(date_obj: datetime) -> int:
     """
     计算给定日期的KIN码（使用新算法）
     """
-    maya_info = calculate_maya_date_info(date_obj)
-    return maya_info["kin"]
+    return calculate_kin_from_ordinal(date_obj.toordinal())
 
 def get_maya_seal(kin: int) -> Dict[str, Any]:
     """
     根据KIN码获取玛雅印记及其详细信息
     返回印记名称和详细解释
     """
-    # KIN码对应的印记索引（0-19循环）
-    seal_index = (kin - 1) % 20
-    seal_name = MAYA_SEAL_LIST[seal_index]
-    
-    # 获取印记的详细信息
-    seal_info = MAYA_SEALS[seal_name]
-    
+    entry = get_tzolkin_entry(kin)
     return {
-        "name": seal_name,
-        "details": seal_info
+        "name": entry.seal_name,
+        "details": entry.seal_details
     }
 
 def get_maya_tone(kin: int) -> Dict[str, Any]:
@@ -97,64 +210,135 @@ def get_maya_tone(kin: int) -> Dict[str, Any]:
     根据KIN码获取玛雅音调及其详细信息
     返回音调名称和详细解释
     """
-    # KIN码对应的音调索引（0-12循环）
-    tone_index = (kin - 1) % 13
-    tone_name = MAYA_TONE_LIST[tone_index]
-    
-    # 获取音调的详细信息
-    tone_info = MAYA_TONES[tone_name]
-    
+    entry = get_tzolkin_entry(kin)
     return {
-        "name": tone_name,
-        "details": tone_info
+        "name": entry.tone_name,
+        "details": entry.tone_details
     }
 
-def calculate_maya_month(date_obj: datetime) -> Dict[str, Any]:
+# ==================== 13月历 ====================
+
+# 13月历查找表覆盖的年份范围（某日期所属13月历年份的起始公历年）
+THIRTEEN_MOON_FIRST_YEAR = 0
+THIRTEEN_MOON_LAST_YEAR = 9999
+# 13月历一年计入的天数（13 × 28 + 无时间日）
+THIRTEEN_MOON_YEAR_DAYS = len(MAYA_MONTHS) * THIRTEEN_MOON_MONTH_DAYS + 1
+
+def _build_thirteen_moon_tables() -> Tuple[np.ndarray, np.ndarray]:
     """
-    计算玛雅月份和天数
-    使用更精确的计算方法，考虑了玛雅13月历
+    预计算每个13月历年份的起始日期序号，以及该年份内2月29日的日期序号（不是闰年时为极大值）
+    下标为 起始公历年 - THIRTEEN_MOON_FIRST_YEAR
     """
-    # 玛雅13月历的起始日期（通常是7月26日）
-    maya_year_start = datetime(date_obj.year, 7, 26)
-    
-    # 如果当前日期在今年7月26日之前，使用去年的起始日期
-    if date_obj < maya_year_start:
-        maya_year_start = datetime(date_obj.year - 1, 7, 26)
-    
-    # 计算从玛雅年开始的天数
-    days_since_maya_year_start = (date_obj - maya_year_start).days
+    start_month, start_day = THIRTEEN_MOON_YEAR_START
+    years = np.arange(THIRTEEN_MOON_FIRST_YEAR, THIRTEEN_MOON_LAST_YEAR + 1)
+    months = (years - 1970) * 12 + (start_month - 1)
+    year_starts = months.astype('datetime64[M]').astype('datetime64[D]') + (start_day - 1)
+    
+    # 13月历年份跨越两个公历年，其中的2月29日属于后一个公历年
+    next_years = years + 1
+    is_leap = (next_years % 4 == 0) & ((next_years % 100 != 0) | (next_years % 400 == 0))
+    feb_29 = ((next_years - 1970) * 12 + 1).astype('datetime64[M]').astype('datetime64[D]') + 28
+    leap_days = np.where(is_leap, feb_29.astype(np.int64), np.iinfo(np.int64).max - EPOCH_ORDINAL)
+    
+    year_start_ordinals = year_starts.astype(np.int64) + EPOCH_ORDINAL
+    leap_day_ordinals = leap_days + EPOCH_ORDINAL
+    for table in (year_start_ordinals, leap_day_ordinals):
+        table.setflags(write=False)
+    return year_start_ordinals, leap_day_ordinals
+
+THIRTEEN_MOON_YEAR_STARTS, THIRTEEN_MOON_LEAP_DAYS = _build_thirteen_moon_tables()
+# 逐日计算使用的Python列表版本
+_THIRTEEN_MOON_YEAR_START_LIST = THIRTEEN_MOON_YEAR_STARTS.tolist()
+_THIRTEEN_MOON_LEAP_DAY_LIST = THIRTEEN_MOON_LEAP_DAYS.tolist()
+
+def convert_to_thirteen_moon(ordinals) -> Dict[str, np.ndarray]:
+    """
+    向量化地将日期序号（date.toordinal()）转换为13月历日期
+    
+    Returns:
+        dict: 均为与输入等长的数组
+            "year": 13月历年份的起始公历年
+            "year_day": 计入的第几天（1-365，零日与前一天相同）
+            "moon": 第几个月（1-13，无时间日为0）
+            "day": 月内第几天（1-28，无时间日为0）
+            "day_out_of_time": 是否为无时间日
+            "leap_day": 是否为零日（2月29日）
+    """
+    ordinals = np.asarray(ordinals, dtype=np.int64)
+    years = (ordinals - EPOCH_ORDINAL).astype('datetime64[D]').astype('datetime64[Y]').astype(np.int64) + 1970
     
-    # 计算玛雅月份（每月28天）
-    maya_month_index = days_since_maya_year_start // 28
-    maya_day = days_since_maya_year_start % 28 + 1
+    # 7月26日之前的日期属于上一个13月历年份
+    index = years - THIRTEEN_MOON_FIRST_YEAR
+    index = index - (ordinals < THIRTEEN_MOON_YEAR_STARTS[index])
+    leap_days = THIRTEEN_MOON_LEAP_DAYS[index]
     
-    # 处理超出13个月的情况（第13个月可能有29天）
-    if maya_month_index >= 13:
-        maya_month_index = 12
-        maya_day += (days_since_maya_year_start - 12 * 28)
+    # 零日不计入天数，之后的日期向前顺延一天
+    leap_day = ordinals == leap_days
+    counted = ordinals - THIRTEEN_MOON_YEAR_STARTS[index] - (ordinals >= leap_days)
+    day_out_of_time = counted == THIRTEEN_MOON_YEAR_DAYS - 1
     
-    # 确保索引在有效范围内
-    maya_month_index = maya_month_index % len(MAYA_MONTHS)
+    return {
+        "year": index + THIRTEEN_MOON_FIRST_YEAR,
+        "year_day": counted + 1,
+        "moon": np.where(day_out_of_time, 0, counted // THIRTEEN_MOON_MONTH_DAYS + 1),
+        "day": np.where(day_out_of_time, 0, counted % THIRTEEN_MOON_MONTH_DAYS + 1),
+        "day_out_of_time": day_out_of_time,
+        "leap_day": leap_day
+    }
+
+def _thirteen_moon_info(moon: int, day: int, year_day: int, day_out_of_time: bool, leap_day: bool) -> Dict[str, Any]:
+    """组装13月历日期信息"""
+    if day_out_of_time:
+        return {
+            "month": DAY_OUT_OF_TIME_NAME,
+            "day": None,
+            "moon": None,
+            "year_day": year_day,
+            "day_out_of_time": True,
+            "leap_day": False,
+            "display": DAY_OUT_OF_TIME_NAME
+        }
     
+    month_name = MAYA_MONTHS[moon - 1]
+    display = f"{month_name} | 第{day}天"
+    if leap_day:
+        display += f" | {HUNAB_KU_NAME}"
     return {
-        "month": MAYA_MONTHS[maya_month_index],
-        "day": maya_day,
-        "display": f"{MAYA_MONTHS[maya_month_index]} | 第{maya_day}天"
+        "month": month_name,
+        "day": day,
+        "moon": moon,
+        "year_day": year_day,
+        "day_out_of_time": False,
+        "leap_day": leap_day,
+        "display": display
     }
 
-def get_personalized_suggestions(date_obj: datetime, kin: int) -> Dict[str, List[str]]:
+def calculate_maya_month(date_obj: datetime) -> Dict[str, Any]:
     """
-    获取个性化建议和禁忌
-    基于日期和KIN码生成确定性的建议
+    计算13月历的月份和天数（与convert_to_thirteen_moon使用相同的查找表）
+    7月25日为无时间日，2月29日为零日（与2月28日同属一天，不计入天数）
+    """
+    ordinal = date_obj.toordinal()
+    index = date_obj.year - THIRTEEN_MOON_FIRST_YEAR
+    if ordinal < _THIRTEEN_MOON_YEAR_START_LIST[index]:
+        index -= 1
+    leap_day_ordinal = _THIRTEEN_MOON_LEAP_DAY_LIST[index]
+    counted = ordinal - _THIRTEEN_MOON_YEAR_START_LIST[index] - (ordinal >= leap_day_ordinal)
+    
+    return _thirteen_moon_info(
+        counted // THIRTEEN_MOON_MONTH_DAYS + 1,
+        counted % THIRTEEN_MOON_MONTH_DAYS + 1,
+        counted + 1,
+        counted == THIRTEEN_MOON_YEAR_DAYS - 1,
+        ordinal == leap_day_ordinal
+    )
+
+@lru_cache(maxsize=None)
+def _select_suggestions(seed_value: int) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """
+    根据种子值确定性地选择建议和避免事项
+    结果只取决于种子值对列表长度的余数，缓存后批量计算无需重复选择
     """
-    # 使用确定性算法替代随机选择
-    seed_value = date_obj.year * 10000 + date_obj.month * 100 + date_obj.day + kin
-    
-    # 获取印记和音调
-    seal = get_maya_seal(kin)
-    tone = get_maya_tone(kin)
-    
-    # 根据印记和音调的特质选择更相关的建议
     all_suggestions = SUGGESTIONS["建议"]
     all_avoidances = SUGGESTIONS["避免"]
     
@@ -179,24 +363,29 @@ def get_personalized_suggestions(date_obj: datetime, kin: int) -> Dict[str, List
     while len(avoidances) < 3:
         avoidances.append("避免过度焦虑和负面思考")
     
+    return tuple(suggestions), tuple(avoidances)
+
+def _suggestions_for_seed(seed_value: int) -> Dict[str, List[str]]:
+    """根据种子值生成建议和禁忌（每次返回新的列表）"""
+    suggestions, avoidances = _select_suggestions(
+        seed_value % (len(SUGGESTIONS["建议"]) * len(SUGGESTIONS["避免"]))
+    )
     return {
-        "建议": suggestions,
-        "避免": avoidances
+        "建议": list(suggestions),
+        "避免": list(avoidances)
     }
 
-def get_personalized_lucky_items(date_obj: datetime, kin: int) -> Dict[str, Dict[str, str]]:
+def get_personalized_suggestions(date_obj: datetime, kin: int) -> Dict[str, List[str]]:
     """
-    获取个性化幸运物品
-    基于日期和KIN码生成确定性的幸运物品
+    获取个性化建议和禁忌
+    基于日期和KIN码生成确定性的建议
     """
     # 使用确定性算法替代随机选择
     seed_value = date_obj.year * 10000 + date_obj.month * 100 + date_obj.day + kin
-    
-    # 获取印记和音调
-    seal_info = get_maya_seal(kin)
-    tone_info = get_maya_tone(kin)
-    
-    # 使用确定性选择替代随机选择
+    return _suggestions_for_seed(seed_value)
+
+def _lucky_items_for_seed(seed_value: int) -> Dict[str, str]:
+    """根据种子值确定性地选择幸运物品"""
     lucky_colors = LUCKY_ITEMS["幸运色"]
     lucky_numbers = LUCKY_ITEMS["幸运数字"]
     lucky_foods = LUCKY_ITEMS["幸运食物"]
@@ -219,57 +408,92 @@ def get_personalized_lucky_items(date_obj: datetime, kin: int) -> Dict[str, Dict
         "幸运食物": lucky_food["食物"]
     }
 
-def calculate_energy_scores(date_obj: datetime, kin: int) -> Dict[str, Dict[str, Any]]:
+def get_personalized_lucky_items(date_obj: datetime, kin: int) -> Dict[str, Dict[str, str]]:
     """
-    计算能量分数
-    使用更精确的算法，基于日期、KIN码、月相等因素
+    获取个性化幸运物品
+    基于日期和KIN码生成确定性的幸运物品
     """
-    # 使用日期和KIN码作为基础
-    day_of_year = date_obj.timetuple().tm_yday
-    month = date_obj.month
-    day = date_obj.day
-    
-    # 计算月相因子（简化版）
-    moon_phase_factor = (day_of_year % 30) / 30.0
+    # 使用确定性算法替代随机选择
+    seed_value = date_obj.year * 10000 + date_obj.month * 100 + date_obj.day + kin
+    return _lucky_items_for_seed(seed_value)
+
+# 能量类别（顺序即输出顺序）
+ENERGY_CATEGORIES = ["综合", "爱情", "财富", "事业", "学习"]
+# 二进制列式格式中使用的ASCII列名
+ENERGY_CATEGORY_CODES = {"综合": "overall", "爱情": "love", "财富": "wealth", "事业": "career", "学习": "study"}
+
+# 各类别变化量种子的偏移：类别名称稳定哈希值 % 1000，所有进程一致
+ENERGY_CATEGORY_OFFSETS = {key: stable_hash(key) % 1000 for key in ENERGY_CATEGORIES}
+
+def _periodic_table(values) -> np.ndarray:
+    """将按整数下标预计算的因子保存为只读数组"""
+    table = np.array(values, dtype=np.float64)
+    table.setflags(write=False)
+    return table
+
+# 能量计算中的三角函数因子只取决于整数（一年中的第几天、月、日、KIN码），
+# 以math库预先计算为查找表，逐日计算与向量化计算共用，结果逐位一致
+# 基础能量值（60-75之间）：65 + 5 * 太阳能量因子 + 5 * 月相因子，按一年中的第几天索引
+ENERGY_BASE_TABLE = _periodic_table([
+    65 + 5 * math.sin(2 * math.pi * doy / 365.0) + 5 * ((doy % 30) / 30.0) for doy in range(367)
+])
+
+# 各领域的能量调整因子：(查找表, 索引字段)
+ENERGY_ADJUSTMENTS = {
+    "综合": (_periodic_table([0.0] * 367), "day_of_year"),
+    "爱情": (_periodic_table([3 * math.sin(2 * math.pi * month / 12) for month in range(13)]), "month"),
+    "财富": (_periodic_table([4 * math.cos(2 * math.pi * day / 31) for day in range(32)]), "day"),
+    "事业": (_periodic_table([3 * math.sin(2 * math.pi * kin / 260) for kin in range(261)]), "kin"),
+    "学习": (_periodic_table([4 * math.cos(2 * math.pi * doy / 365) for doy in range(367)]), "day_of_year")
+}
+
+def calculate_energy_score_arrays(years: np.ndarray, months: np.ndarray, days: np.ndarray,
+                                  day_of_year: np.ndarray, kins: np.ndarray) -> Dict[str, Dict[str, np.ndarray]]:
+    """
+    向量化计算能量分数，一次计算整个日期范围
     
-    # 计算太阳能量因子（基于一年中的位置）
-    solar_factor = math.sin(2 * math.pi * day_of_year / 365.0)
+    每个类别的分数 = 基础能量 + 领域调整 + 确定性变化量，限制在50-95并四舍五入；
+    变化量由 年*10000 + 月*100 + 日 + 类别偏移 + KIN码 经线性同余生成器得到，范围[-8, 8)
     
-    # 计算KIN码能量因子
-    kin_factor = (kin % 13) / 13.0
+    Returns:
+        dict: "scores"（int64）和"variations"（float64），均为 类别 -> 与输入等长的数组
+    """
+    indices = {"day_of_year": day_of_year, "month": months, "day": days, "kin": kins}
+    base_energy = ENERGY_BASE_TABLE[day_of_year]
+    date_seed = years * 10000 + months * 100 + days
     
-    # 基础能量值（60-75之间）
-    base_energy = 65 + 5 * solar_factor + 5 * moon_phase_factor
+    scores = {}
+    variations = {}
+    for key in ENERGY_CATEGORIES:
+        table, field = ENERGY_ADJUSTMENTS[key]
+        variation_seed = date_seed + ENERGY_CATEGORY_OFFSETS[key] + kins
+        # 使用简单的线性同余生成器生成确定性变化
+        variation = ((variation_seed * 1664525 + 1013904223) % (2**32)) / (2**32) * 16 - 8
+        score = np.clip(base_energy + table[indices[field]] + variation, 50, 95)
+        scores[key] = np.round(score).astype(np.int64)
+        variations[key] = variation
     
-    # 各领域的能量调整因子
-    adjustments = {
-        "综合": 0,
-        "爱情": 3 * math.sin(2 * math.pi * month / 12),
-        "财富": 4 * math.cos(2 * math.pi * day / 31),
-        "事业": 3 * math.sin(2 * math.pi * kin / 260),
-        "学习": 4 * math.cos(2 * math.pi * day_of_year / 365)
+    return {
+        "scores": scores,
+        "variations": variations
     }
+
+def calculate_energy_scores(date_obj: datetime, kin: int) -> Dict[str, Dict[str, Any]]:
+    """
+    计算单日的能量分数（使用与calculate_energy_score_arrays相同的查找表和公式）
+    """
+    day_of_year = date_obj.timetuple().tm_yday
+    indices = {"day_of_year": day_of_year, "month": date_obj.month, "day": date_obj.day, "kin": kin}
+    base_energy = float(ENERGY_BASE_TABLE[day_of_year])
+    date_seed = date_obj.year * 10000 + date_obj.month * 100 + date_obj.day
     
-    # 计算最终能量分数
     scores = {}
     details = {}
-    
-    for key, adjustment in adjustments.items():
-        # 计算基础分数
-        score = base_energy + adjustment
-        
-        # 添加确定性变化（保持一致性）
-        # 使用确定性算法替代随机变化
-        variation_seed = date_obj.year * 10000 + date_obj.month * 100 + date_obj.day + hash(key) % 1000 + kin
-        # 使用简单的线性同余生成器生成确定性变化
+    for key in ENERGY_CATEGORIES:
+        table, field = ENERGY_ADJUSTMENTS[key]
+        variation_seed = date_seed + ENERGY_CATEGORY_OFFSETS[key] + kin
         variation = ((variation_seed * 1664525 + 1013904223) % (2**32)) / (2**32) * 16 - 8
-        score += variation
-        
-        # 确保分数在合理范围内
-        score = max(50, min(score, 95))
-        
-        # 四舍五入到整数
-        score = round(score)
+        score = round(max(50, min(base_energy + float(table[indices[field]]) + variation, 95)))
         
         # 存储分数和详细信息
         scores[key] = score
@@ -329,15 +553,8 @@ def get_energy_suggestion(category: str, score: int) -> str:
     
     return "保持平衡，关注自己的需求"
 
-def get_daily_inspiration(date_obj: datetime, kin: int) -> Dict[str, Any]:
-    """
-    获取每日灵感信息
-    基于日期和KIN码选择确定性的信息
-    """
-    # 使用确定性算法替代随机选择
-    seed_value = date_obj.year * 10000 + date_obj.month * 100 + date_obj.day + kin
-    
-    # 使用确定性选择替代随机选择
+def _inspiration_for_seed(seed_value: int) -> Dict[str, Any]:
+    """根据种子值确定性地选择每日信息和语录"""
     message_index = seed_value % len(DAILY_MESSAGES)
     daily_message = DAILY_MESSAGES[message_index]
     
@@ -349,194 +566,654 @@ def get_daily_inspiration(date_obj: datetime, kin: int) -> Dict[str, Any]:
         "quote": daily_quote
     }
 
+def get_daily_inspiration(date_obj: datetime, kin: int) -> Dict[str, Any]:
+    """
+    获取每日灵感信息
+    基于日期和KIN码选择确定性的信息
+    """
+    # 使用确定性算法替代随机选择
+    seed_value = date_obj.year * 10000 + date_obj.month * 100 + date_obj.day + kin
+    return _inspiration_for_seed(seed_value)
+
+# 简化版特殊日期（实际应使用天文计算）：(月, 日) -> 名称
+SPECIAL_DATES = {
+    (3, 20): "春分",  # 约3月20日
+    (6, 21): "夏至",  # 约6月21日
+    (9, 23): "秋分",  # 约9月23日
+    (12, 21): "冬至"  # 约12月21日
+}
+
+def _special_date_for(month: int, day: int) -> Optional[Dict[str, Any]]:
+    """根据月、日查找特殊日期信息"""
+    special_date_name = SPECIAL_DATES.get((month, day))
+    if special_date_name is None:
+        return None
+    return {
+        "name": special_date_name,
+        "info": MAYA_KEY_DATES[special_date_name]
+    }
+
 def check_special_date(date_obj: datetime) -> Optional[Dict[str, Any]]:
     """检查是否是特殊日期（如冬至、春分、夏至、秋分等）"""
-    year = date_obj.year
-    month = date_obj.month
-    day = date_obj.day
-    
-    # 简化版特殊日期检查（实际应使用天文计算）
-    special_dates = {
-        (3, 20): "春分",  # 约3月20日
-        (6, 21): "夏至",  # 约6月21日
-        (9, 23): "秋分",  # 约9月23日
-        (12, 21): "冬至"  # 约12月21日
-    }
+    return _special_date_for(date_obj.month, date_obj.day)
+
+# 每日时段指引
+DAILY_GUIDANCE = {
+    "morning": "保持平静的心态，专注于当下的任务",
+    "afternoon": "处理重要事务，保持专注和耐心",
+    "evening": "放松身心，回顾今日的收获和成长"
+}
+
+class _MayaDay:
+    """单日玛雅信息的计算上下文，各部分在首次使用时计算并缓存"""
     
-    date_key = (month, day)
-    if date_key in special_dates:
-        special_date_name = special_dates[date_key]
-        return {
-            "name": special_date_name,
-            "info": MAYA_KEY_DATES[special_date_name]
-        }
+    def __init__(self, date_obj: datetime):
+        self.date_obj = date_obj
+        self.kin = calculate_kin_from_ordinal(date_obj.toordinal())
+        self.entry = TZOLKIN_TABLE[self.kin - 1]
+    
+    @cached_property
+    def energy(self) -> Dict[str, Dict[str, Any]]:
+        return calculate_energy_scores(self.date_obj, self.kin)
+    
+    @cached_property
+    def inspiration(self) -> Dict[str, Any]:
+        return get_daily_inspiration(self.date_obj, self.kin)
+
+# 玛雅日历信息的各字段及其计算方式（顺序即输出顺序）
+_MAYA_FIELD_BUILDERS = {
+    "date": lambda day: get_date_str(day.date_obj),
+    "weekday": lambda day: get_weekday(day.date_obj),
+    "maya_kin": lambda day: day.kin,  # 直接返回数字，不加前缀
+    "maya_tone": lambda day: day.entry.tone_name,
+    "maya_month": lambda day: calculate_maya_month(day.date_obj),
+    "maya_seal": lambda day: day.entry.seal_name,
+    "maya_seal_info": lambda day: day.entry.seal_details,
+    "maya_tone_info": lambda day: day.entry.tone_details,
+    "maya_seal_desc": lambda day: day.entry.full_name,  # 完整描述：调性的图腾
+    "maya_oracle": lambda day: ORACLE_TABLE[day.kin - 1],
+    "suggestions": lambda day: get_personalized_suggestions(day.date_obj, day.kin),
+    "lucky_items": lambda day: get_personalized_lucky_items(day.date_obj, day.kin),
+    "daily_message": lambda day: day.inspiration["message"],
+    "daily_quote": lambda day: day.inspiration["quote"],
+    "energy_scores": lambda day: day.energy["scores"],
+    "energy_details": lambda day: day.energy["details"],
+    "special_date": lambda day: check_special_date(day.date_obj),
+    "daily_guidance": lambda day: dict(DAILY_GUIDANCE)
+}
+
+MAYA_INFO_FIELDS = list(_MAYA_FIELD_BUILDERS)
+
+def parse_maya_fields(fields) -> Optional[List[str]]:
+    """
+    解析字段投影参数（逗号分隔的字符串或列表），返回按输出顺序排列的字段列表
+    未指定时返回None表示全部字段；"date"始终包含
     
-    return None
+    Raises:
+        ValueError: 包含未知字段
+    """
+    if fields is None:
+        return None
+    names = [name.strip() for name in fields.split(",")] if isinstance(fields, str) else list(fields)
+    names = [name for name in names if name]
+    if not names:
+        return None
+    
+    unknown = [name for name in names if name not in _MAYA_FIELD_BUILDERS]
+    if unknown:
+        raise ValueError(f"未知的字段: {', '.join(unknown)}，可选字段: {', '.join(MAYA_INFO_FIELDS)}")
+    requested = set(names) | {"date"}
+    return [field for field in MAYA_INFO_FIELDS if field in requested]
 
-def generate_maya_info(date_obj: datetime) -> Dict[str, Any]:
+def generate_maya_info(date_obj: datetime, fields: Optional[List[str]] = None) -> Dict[str, Any]:
     """
     生成指定日期的玛雅日历信息
     使用与前端一致的计算方法
+    
+    Args:
+        date_obj: 日期
+        fields: parse_maya_fields返回的字段列表，只计算这些字段；None表示全部字段
     """
-    # 基础日期信息
-    date_str = get_date_str(date_obj)
-    weekday = get_weekday(date_obj)
-    
-    # 使用新的算法计算玛雅历法信息
-    maya_date_info = calculate_maya_date_info(date_obj)
-    kin = maya_date_info["kin"]
-    
-    # 获取玛雅印记和音调（包含详细信息）
-    seal_info = get_maya_seal(kin)
-    tone_info = get_maya_tone(kin)
-    
-    # 获取玛雅月份和天数
-    maya_month_info = calculate_maya_month(date_obj)
-    
-    # 生成玛雅印记描述（使用新算法的结果）
-    seal_desc = maya_date_info["full_name"]
-    
-    # 获取个性化建议和禁忌
-    suggestions = get_personalized_suggestions(date_obj, kin)
-    
-    # 获取个性化幸运物品
-    lucky_items = get_personalized_lucky_items(date_obj, kin)
-    
-    # 计算能量分数
-    energy_info = calculate_energy_scores(date_obj, kin)
-    
-    # 获取每日灵感
-    inspiration = get_daily_inspiration(date_obj, kin)
-    
-    # 检查是否是特殊日期
-    special_date = check_special_date(date_obj)
-    
-    # 构建玛雅日历信息
-    maya_info = {
-        "date": date_str,
-        "weekday": weekday,
-        "maya_kin": kin,  # 直接返回数字，不加前缀
-        "maya_tone": maya_date_info["tone_name"],  # 使用新算法的调性
-        "maya_month": maya_month_info,
-        "maya_seal": maya_date_info["seal_name"],  # 使用新算法的图腾
-        "maya_seal_info": seal_info["details"],
-        "maya_tone_info": tone_info["details"],
-        "maya_seal_desc": seal_desc,  # 完整描述：调性的图腾
-        "suggestions": suggestions,
-        "lucky_items": lucky_items,
-        "daily_message": inspiration["message"],
-        "daily_quote": inspiration["quote"],
-        "energy_scores": energy_info["scores"],
-        "energy_details": energy_info["details"],
-        "special_date": special_date,
-        "daily_guidance": {
-            "morning": "保持平静的心态，专注于当下的任务",
-            "afternoon": "处理重要事务，保持专注和耐心",
-            "evening": "放松身心，回顾今日的收获和成长"
-        }
+    day = _MayaDay(date_obj)
+    return {
+        field: _MAYA_FIELD_BUILDERS[field](day)
+        for field in (MAYA_INFO_FIELDS if fields is None else fields)
     }
-    
-    return maya_info
 
-def get_today_maya_info() -> Dict[str, Any]:
+def get_today_maya_info(fields=None) -> Dict[str, Any]:
     """获取今日玛雅日历信息"""
+    fields = parse_maya_fields(fields)
     today = datetime.now()
-    return generate_maya_info(today)
+    return generate_maya_info(today, fields)
 
-def get_date_maya_info(date_str: str) -> Dict[str, Any]:
+def get_date_maya_info(date_str: str, fields=None) -> Dict[str, Any]:
     """获取指定日期的玛雅日历信息"""
+    fields = parse_maya_fields(fields)
     try:
         date_obj = datetime.strptime(date_str, "%Y-%m-%d")
-        return generate_maya_info(date_obj)
+        return generate_maya_info(date_obj, fields)
     except ValueError:
         # 处理日期格式错误
         return {"error": "日期格式无效，请使用YYYY-MM-DD格式"}
 
-def get_maya_info_range(days_before: int = 3, days_after: int = 3) -> Dict[str, Any]:
-    """获取一段时间内的玛雅日历信息"""
-    today = datetime.now()
-    start_date = today - timedelta(days=days_before)
-    end_date = today + timedelta(days=days_after)
+def calculate_maya_window(start_date, end_date, with_energy: bool = True) -> Dict[str, np.ndarray]:
+    """
+    一次性计算日期窗口内每天的玛雅历法数值（列式结果）
     
-    # 生成日期范围内的每一天
-    current_date = start_date
-    maya_info_list = []
+    Args:
+        with_energy: 是否计算能量分数
     
-    while current_date <= end_date:
-        maya_info = generate_maya_info(current_date)
-        maya_info_list.append(maya_info)
-        current_date += timedelta(days=1)
+    Returns:
+        dict: 日期、KIN码、13月历月份/天数、种子值和各类别能量分数等数组
+    """
+    start_day = np.datetime64(parse_date(start_date), 'D')
+    end_day = np.datetime64(parse_date(end_date), 'D')
+    dates = np.arange(start_day, end_day + 1, dtype='datetime64[D]')
+    
+    ordinals = dates.astype(np.int64) + EPOCH_ORDINAL
+    kins = calculate_kin_from_ordinal(ordinals)
+    
+    # 公历年、月、日以及一年中的第几天
+    year_starts = dates.astype('datetime64[Y]')
+    month_starts = dates.astype('datetime64[M]')
+    years = year_starts.astype(np.int64) + 1970
+    months = month_starts.astype(np.int64) % 12 + 1
+    days = (dates - month_starts).astype(np.int64) + 1
+    day_of_year = (dates - year_starts).astype(np.int64) + 1
+    
+    window = {
+        "dates": dates,
+        "kins": kins,
+        "weekdays": (ordinals + 6) % 7,
+        "months": months,
+        "days": days,
+        "seeds": years * 10000 + months * 100 + days + kins,
+        "thirteen_moon": convert_to_thirteen_moon(ordinals)
+    }
+    if with_energy:
+        energy = calculate_energy_score_arrays(years, months, days, day_of_year, kins)
+        window["energy_scores"] = energy["scores"]
+        window["energy_variations"] = energy["variations"]
+    return window
+
+@lru_cache(maxsize=None)
+def _energy_suggestion_table(category: str) -> Tuple[str, ...]:
+    """某个能量类别在各分数（0-100）下的建议文本"""
+    return tuple(get_energy_suggestion(category, score) for score in range(101))
+
+WEEKDAY_NAMES = ["星期一", "星期二", "星期三", "星期四", "星期五", "星期六", "星期日"]
+
+class _MayaWindowColumns:
+    """日期窗口的列式计算上下文，各列在首次使用时由数组转换并缓存"""
+    
+    def __init__(self, window: Dict[str, np.ndarray]):
+        self.window = window
+        self.kins = window["kins"].tolist()
+        self.seeds = window["seeds"].tolist()
+    
+    @cached_property
+    def entries(self) -> List[TzolkinEntry]:
+        return [TZOLKIN_TABLE[kin - 1] for kin in self.kins]
+    
+    @cached_property
+    def inspirations(self) -> List[Dict[str, Any]]:
+        return [_inspiration_for_seed(seed_value) for seed_value in self.seeds]
+    
+    @cached_property
+    def thirteen_moon(self) -> List[Dict[str, Any]]:
+        columns = [
+            self.window["thirteen_moon"][name].tolist()
+            for name in ("moon", "day", "year_day", "day_out_of_time", "leap_day")
+        ]
+        return [_thirteen_moon_info(*values) for values in zip(*columns)]
+    
+    @cached_property
+    def energy(self) -> Tuple[List[Dict[str, int]], List[Dict[str, Dict[str, Any]]]]:
+        """每天的能量分数和能量详情"""
+        categories = list(self.window["energy_scores"])
+        scores = [self.window["energy_scores"][key].tolist() for key in categories]
+        variations = [self.window["energy_variations"][key] for key in categories]
+        trends = [(variation > 0).tolist() for variation in variations]
+        intensities = [np.abs(np.round(variation)).astype(np.int64).tolist() for variation in variations]
+        suggestion_tables = [_energy_suggestion_table(key) for key in categories]
+        
+        energy_scores = []
+        energy_details = []
+        for i in range(len(self.kins)):
+            day_scores = {}
+            day_details = {}
+            for c, key in enumerate(categories):
+                score = scores[c][i]
+                day_scores[key] = score
+                day_details[key] = {
+                    "score": score,
+                    "trend": "上升" if trends[c][i] else "下降",
+                    "intensity": intensities[c][i],
+                    "suggestion": suggestion_tables[c][score]
+                }
+            energy_scores.append(day_scores)
+            energy_details.append(day_details)
+        return energy_scores, energy_details
+
+# 各字段在日期窗口上的列式计算方式，与_MAYA_FIELD_BUILDERS一一对应
+_MAYA_COLUMN_BUILDERS = {
+    "date": lambda w: np.datetime_as_string(w.window["dates"], unit='D').tolist(),
+    "weekday": lambda w: [WEEKDAY_NAMES[weekday] for weekday in w.window["weekdays"].tolist()],
+    "maya_kin": lambda w: w.kins,
+    "maya_tone": lambda w: [entry.tone_name for entry in w.entries],
+    "maya_month": lambda w: w.thirteen_moon,
+    "maya_seal": lambda w: [entry.seal_name for entry in w.entries],
+    "maya_seal_info": lambda w: [entry.seal_details for entry in w.entries],
+    "maya_tone_info": lambda w: [entry.tone_details for entry in w.entries],
+    "maya_seal_desc": lambda w: [entry.full_name for entry in w.entries],
+    "maya_oracle": lambda w: [ORACLE_TABLE[kin - 1] for kin in w.kins],
+    "suggestions": lambda w: [_suggestions_for_seed(seed_value) for seed_value in w.seeds],
+    "lucky_items": lambda w: [_lucky_items_for_seed(seed_value) for seed_value in w.seeds],
+    "daily_message": lambda w: [inspiration["message"] for inspiration in w.inspirations],
+    "daily_quote": lambda w: [inspiration["quote"] for inspiration in w.inspirations],
+    "energy_scores": lambda w: w.energy[0],
+    "energy_details": lambda w: w.energy[1],
+    "special_date": lambda w: [
+        _special_date_for(month, day)
+        for month, day in zip(w.window["months"].tolist(), w.window["days"].tolist())
+    ],
+    "daily_guidance": lambda w: [dict(DAILY_GUIDANCE) for _ in w.kins]
+}
+
+# 需要计算能量分数的字段
+ENERGY_INFO_FIELDS = {"energy_scores", "energy_details"}
+
+def _maya_window_records(window: Dict[str, np.ndarray], fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """将calculate_maya_window的列式结果组装为与generate_maya_info相同结构的逐日记录"""
+    fields = MAYA_INFO_FIELDS if fields is None else fields
+    context = _MayaWindowColumns(window)
+    columns = [_MAYA_COLUMN_BUILDERS[field](context) for field in fields]
+    return [dict(zip(fields, values)) for values in zip(*columns)]
+
+def _resolve_maya_range(start_date=None, end_date=None, days_before: int = 3,
+                        days_after: int = 3) -> Tuple[date, date]:
+    """
+    确定查询的日期范围并校验长度
+    提供start_date/end_date时使用绝对日期，否则使用相对今天的days_before/days_after
     
-    return {
+    Raises:
+        ValueError: 日期格式无效、结束日期早于开始日期或超过一个历轮回
+    """
+    if start_date is not None or end_date is not None:
+        if start_date is None or end_date is None:
+            raise ValueError("start_date和end_date需要同时提供")
+        start, end = parse_date(start_date), parse_date(end_date)
+    else:
+        start, end = get_date_range(datetime.now().date(), days_before, days_after)
+    
+    if end < start:
+        raise ValueError("结束日期不能早于开始日期")
+    if (end - start).days + 1 > MAX_MAYA_RANGE_DAYS:
+        raise ValueError(f"日期范围过大，最多{MAX_MAYA_RANGE_DAYS}天（一个玛雅历轮回）")
+    return start, end
+
+def _iter_maya_chunks(start: date, end: date, chunk_days: int,
+                      fields: Optional[List[str]] = None) -> Iterator[List[Dict[str, Any]]]:
+    """按块计算日期窗口内的玛雅历法信息，每块为逐日记录列表"""
+    with_energy = fields is None or not ENERGY_INFO_FIELDS.isdisjoint(fields)
+    chunk_start = start
+    while chunk_start <= end:
+        chunk_end = min(chunk_start + timedelta(days=chunk_days - 1), end)
+        yield _maya_window_records(calculate_maya_window(chunk_start, chunk_end, with_energy), fields)
+        chunk_start = chunk_end + timedelta(days=1)
+
+def iter_maya_info_range(start_date=None, end_date=None, days_before: int = 3, days_after: int = 3,
+                         chunk_days: int = MAYA_STREAM_CHUNK_DAYS, fields=None) -> Iterator[List[Dict[str, Any]]]:
+    """
+    以生成器方式获取一段时间内的玛雅日历信息，用于流式响应
+    内存占用只与chunk_days有关，与窗口长度无关
+    """
+    # 在开始输出前校验日期范围和字段，不随生成器延迟
+    fields = parse_maya_fields(fields)
+    start, end = _resolve_maya_range(start_date, end_date, days_before, days_after)
+    return _iter_maya_chunks(start, end, chunk_days, fields)
+
+# 紧凑模式下以字典引用的字段及其去重键（配置和查找表中的对象是共享的，可以直接按对象标识去重）
+MAYA_COMPACT_FIELDS = {
+    "maya_seal_info": id,
+    "maya_tone_info": id,
+    "maya_oracle": id,
+    "suggestions": lambda value: (tuple(value["建议"]), tuple(value["避免"])),
+    "lucky_items": lambda value: tuple(value.values()),
+    "daily_message": lambda value: value,
+    "daily_quote": lambda value: value,
+    "special_date": lambda value: value["name"],
+    "daily_guidance": lambda value: tuple(value.values())
+}
+
+def get_maya_info_range(days_before: int = 3, days_after: int = 3,
+                        start_date=None, end_date=None, fields=None, compact: bool = False) -> Dict[str, Any]:
+    """
+    获取一段时间内的玛雅日历信息
+    
+    Args:
+        fields: 字段投影（见parse_maya_fields）
+        compact: 紧凑模式，重复的静态对象放入"dictionary"，记录中对应字段为字典中的下标
+    """
+    fields = parse_maya_fields(fields)
+    start, end = _resolve_maya_range(start_date, end_date, days_before, days_after)
+    
+    maya_info_list = []
+    for records in _iter_maya_chunks(start, end, MAYA_STREAM_CHUNK_DAYS, fields):
+        maya_info_list.extend(records)
+    
+    result = {
         "maya_info_list": maya_info_list,
         "date_range": {
-            "start": get_date_str(start_date),
-            "end": get_date_str(end_date)
+            "start": get_date_str(start),
+            "end": get_date_str(end)
         }
     }
+    if compact:
+        table = ReferenceTable()
+        result["maya_info_list"] = compact_records(maya_info_list, MAYA_COMPACT_FIELDS, table)
+        result["dictionary"] = table.tables
+        result["compact"] = True
+    return result
+
+def get_maya_energy_range(start_date, end_date) -> Dict[str, Any]:
+    """
+    获取日期范围内每天各类别的能量分数（列式NumPy数组），用于能量热力图
+    
+    Returns:
+        dict: "dates"、"kins"，以及 "scores"/"variations"（类别 -> 数组）
+    """
+    start, end = _resolve_maya_range(start_date, end_date)
+    window = calculate_maya_window(start, end)
+    return {
+        "dates": window["dates"],
+        "kins": window["kins"],
+        "scores": window["energy_scores"],
+        "variations": window["energy_variations"]
+    }
+
+# 反向查询结果的最大条数
+MAX_MAYA_OCCURRENCES = 20000
+# 波符（13天为一个波符，共20个）
+MAYA_WAVESPELL_LENGTH = 13
+
+def _resolve_cycle_position(value, names: List[str], label: str) -> int:
+    """
+    将名称或编号（从1开始）解析为周期内的索引（从0开始）
+    
+    Raises:
+        ValueError: 名称不存在或编号超出范围
+    """
+    if isinstance(value, str) and not value.strip().isdigit():
+        if value not in names:
+            raise ValueError(f"未知的{label}: {value}")
+        return names.index(value)
+    number = int(value)
+    if not 1 <= number <= len(names):
+        raise ValueError(f"{label}编号必须在1-{len(names)}之间")
+    return number - 1
 
-def update_maya_history(birth_date_str: str):
-    """更新玛雅历史记录"""
-    global maya_history_dates
+def find_matching_kins(kin=None, seal=None, tone=None, wavespell=None) -> List[int]:
+    """
+    找出同时满足所有条件的KIN码（升序）
+    
+    Args:
+        kin: KIN码（1-260）
+        seal: 图腾名称（如"蓝夜"）或编号（1-20）
+        tone: 调性名称（如"磁性"）或编号（1-13）
+        wavespell: 波符编号（1-20）
+    
+    Raises:
+        ValueError: 未提供任何条件或条件无效
+    """
+    if kin is None and seal is None and tone is None and wavespell is None:
+        raise ValueError("至少需要提供kin、seal、tone或wavespell中的一个条件")
+    
+    kins = np.arange(1, MAYA_TZOLKIN_CYCLE + 1)
+    mask = np.ones(MAYA_TZOLKIN_CYCLE, dtype=bool)
+    if kin is not None:
+        kin = int(kin)
+        if not 1 <= kin <= MAYA_TZOLKIN_CYCLE:
+            raise ValueError(f"KIN码必须在1-{MAYA_TZOLKIN_CYCLE}之间")
+        mask &= kins == kin
+    if seal is not None:
+        mask &= (kins - 1) % 20 == _resolve_cycle_position(seal, MAYA_SEAL_LIST, "图腾")
+    if tone is not None:
+        mask &= (kins - 1) % 13 == _resolve_cycle_position(tone, MAYA_TONE_LIST, "调性")
+    if wavespell is not None:
+        wavespell = int(wavespell)
+        wavespell_count = MAYA_TZOLKIN_CYCLE // MAYA_WAVESPELL_LENGTH
+        if not 1 <= wavespell <= wavespell_count:
+            raise ValueError(f"波符编号必须在1-{wavespell_count}之间")
+        mask &= (kins - 1) // MAYA_WAVESPELL_LENGTH == wavespell - 1
+    return kins[mask].tolist()
+
+def find_maya_occurrences(start_date, end_date, kins: List[int]) -> np.ndarray:
+    """
+    求出日期范围内KIN码属于kins的所有日期
+    每个KIN码的日期是公差为260天的等差数列，直接求首项和项数，代价只与结果数量有关
     
+    Returns:
+        np.ndarray: 升序的datetime64[D]数组
+    
+    Raises:
+        ValueError: 结果数量超过MAX_MAYA_OCCURRENCES
+    """
+    start_ordinal = parse_date(start_date).toordinal()
+    end_ordinal = parse_date(end_date).toordinal()
+    if end_ordinal < start_ordinal:
+        raise ValueError("结束日期不能早于开始日期")
+    
+    # 每个KIN码在范围内第一次出现的日期序号及出现次数
+    targets = np.asarray(kins, dtype=np.int64)
+    start_kin = calculate_kin_from_ordinal(start_ordinal)
+    first = start_ordinal + (targets - start_kin) % MAYA_TZOLKIN_CYCLE
+    counts = np.maximum((end_ordinal - first) // MAYA_TZOLKIN_CYCLE + 1, 0)
+    
+    total = int(counts.sum())
+    if total > MAX_MAYA_OCCURRENCES:
+        raise ValueError(f"匹配结果过多（{total}条），请缩小日期范围或增加条件，最多{MAX_MAYA_OCCURRENCES}条")
+    
+    ordinals = np.concatenate([
+        f + MAYA_TZOLKIN_CYCLE * np.arange(c, dtype=np.int64)
+        for f, c in zip(first.tolist(), counts.tolist())
+    ] or [np.empty(0, dtype=np.int64)])
+    ordinals.sort()
+    return (ordinals - EPOCH_ORDINAL).astype('datetime64[D]')
+
+def _occurrence_records(dates: np.ndarray) -> List[Dict[str, Any]]:
+    """将匹配日期转换为记录列表"""
+    ordinals = (dates.astype(np.int64) + EPOCH_ORDINAL).tolist()
+    records = []
+    for date_str, ordinal in zip(np.datetime_as_string(dates, unit='D').tolist(), ordinals):
+        entry = TZOLKIN_TABLE[calculate_kin_from_ordinal(ordinal) - 1]
+        records.append({
+            "date": date_str,
+            "weekday": WEEKDAY_NAMES[(ordinal + 6) % 7],
+            "maya_kin": entry.kin,
+            "maya_tone": entry.tone_name,
+            "maya_seal": entry.seal_name,
+            "maya_seal_desc": entry.full_name
+        })
+    return records
+
+def get_maya_occurrences(start_date, end_date, kin=None, seal=None, tone=None, wavespell=None) -> Dict[str, Any]:
+    """获取日期范围内满足条件（可组合）的所有日期，例如今年所有的蓝夜日"""
+    kins = find_matching_kins(kin, seal, tone, wavespell)
+    dates = find_maya_occurrences(start_date, end_date, kins)
+    return {
+        "date_range": {
+            "start": get_date_str(parse_date(start_date)),
+            "end": get_date_str(parse_date(end_date))
+        },
+        "matching_kins": kins,
+        "count": len(dates),
+        "occurrences": _occurrence_records(dates)
+    }
+
+def get_next_maya_occurrences(from_date=None, count: int = 1, kin=None, seal=None, tone=None,
+                              wavespell=None, birth_date=None) -> Dict[str, Any]:
+    """
+    获取从指定日期（含当天，默认今天）起满足条件的下count次日期
+    提供birth_date时按出生日期的KIN码查询，即下一个银河生日
+    """
+    if count < 1:
+        raise ValueError("count必须大于0")
+    if birth_date is not None:
+        kin = calculate_kin_number(parse_date(birth_date))
+    kins = find_matching_kins(kin, seal, tone, wavespell)
+    
+    # 每个KIN码每260天恰好出现一次，所需的周期数可直接算出
+    start = parse_date(from_date)
+    dates = np.empty(0, dtype='datetime64[D]')
+    if kins:
+        cycles = -(-count // len(kins))
+        end = start + timedelta(days=cycles * MAYA_TZOLKIN_CYCLE - 1)
+        dates = find_maya_occurrences(start, end, kins)[:count]
+    
+    records = _occurrence_records(dates)
+    for record in records:
+        record["days_until"] = (parse_date(record["date"]) - start).days
+    return {
+        "from_date": get_date_str(start),
+        "matching_kins": kins,
+        "occurrences": records
+    }
+
+# 群体兼容度计算的最大人数
+MAX_MAYA_GROUP_SIZE = 100000
+# 群体兼容度中按关系分组的类型：同KIN以及对称的神谕关系
+GROUP_SYMMETRIC_RELATIONS = ["analog", "antipode", "occult"]
+
+def calculate_kins(birth_dates) -> np.ndarray:
+    """一次性将多个日期转换为KIN码数组"""
+    ordinals = parse_date_array(birth_dates).astype(np.int64) + EPOCH_ORDINAL
+    return calculate_kin_from_ordinal(ordinals)
+
+def calculate_maya_group_compatibility(birth_dates: List[str], max_partners: int = 50) -> Dict[str, Any]:
+    """
+    计算群体成员之间的神谕关系
+    
+    先把成员按KIN码放入260个桶，某个关系的伙伴就是关系KIN码对应桶中的成员，
+    无需两两比较，代价与人数和结果数量成正比
+    
+    Args:
+        birth_dates: 成员出生日期列表，成员以其在列表中的下标标识
+        max_partners: 每个成员每种关系最多返回的伙伴数量（伙伴总数见partner_counts）
+    
+    Returns:
+        dict: "members"为每个成员的KIN码和各关系的伙伴下标，"clusters"为各关系的成员分组
+    
+    Raises:
+        ValueError: 人数超过上限或日期格式无效
+    """
+    if len(birth_dates) > MAX_MAYA_GROUP_SIZE:
+        raise ValueError(f"人数过多，最多{MAX_MAYA_GROUP_SIZE}人")
+    dates = parse_date_array(birth_dates)
+    kins = calculate_kins(dates)
+    
+    # 按KIN码分桶：order中 bucket_starts[k] ~ bucket_starts[k+1] 为KIN码k的成员
+    order = np.argsort(kins, kind='stable')
+    counts = np.bincount(kins, minlength=MAYA_TZOLKIN_CYCLE + 1)
+    bucket_starts = np.concatenate([[0], np.cumsum(counts)])
+    buckets = [
+        order[bucket_starts[k]:bucket_starts[k + 1]].tolist()
+        for k in range(MAYA_TZOLKIN_CYCLE + 1)
+    ]
+    
+    # 每个出现过的KIN码的伙伴列表只计算一次，同KIN成员共用
+    relations = GROUP_SYMMETRIC_RELATIONS + ["guide"]
+    partner_lists = {}
+    for kin in np.nonzero(counts)[0].tolist():
+        partner_lists[kin] = {
+            relation: buckets[int(ORACLE_ARRAYS[relation][kin - 1])] for relation in relations
+        }
+    
+    members = []
+    date_strings = np.datetime_as_string(dates, unit='D').tolist()
+    for i, kin in enumerate(kins.tolist()):
+        same_kin = buckets[kin]
+        partners = {"same_kin": [j for j in same_kin[:max_partners + 1] if j != i][:max_partners]}
+        partner_counts = {"same_kin": len(same_kin) - 1}
+        for relation, partner_members in partner_lists[kin].items():
+            partners[relation] = partner_members[:max_partners]
+            partner_counts[relation] = len(partner_members)
+        members.append({
+            "index": i,
+            "birth_date": date_strings[i],
+            "kin": kin,
+            "full_name": TZOLKIN_TABLE[kin - 1].full_name,
+            "partners": partners,
+            "partner_counts": partner_counts
+        })
+    
+    # 同KIN分组，以及对称关系的成对分组（每对KIN码只输出一次）
+    clusters = {"same_kin": [
+        {"kins": [kin], "members": buckets[kin]}
+        for kin in partner_lists if counts[kin] > 1
+    ]}
+    for relation in GROUP_SYMMETRIC_RELATIONS:
+        clusters[relation] = []
+        for kin in partner_lists:
+            partner_kin = int(ORACLE_ARRAYS[relation][kin - 1])
+            if kin < partner_kin and counts[partner_kin] > 0:
+                clusters[relation].append({
+                    "kins": [kin, partner_kin],
+                    "members": buckets[kin] + buckets[partner_kin]
+                })
+    
+    return {
+        "member_count": len(members),
+        "members": members,
+        "clusters": clusters
+    }
+
+def update_maya_history(birth_date_str: str, client_id: str = DEFAULT_CLIENT_ID) -> bool:
+    """更新玛雅历史记录，日期格式无效时不更新并返回False"""
     try:
         # 验证日期格式
         datetime.strptime(birth_date_str, "%Y-%m-%d")
-        
-        # 如果日期已经在历史记录中，先移除它
-        if birth_date_str in maya_history_dates:
-            maya_history_dates.remove(birth_date_str)
-        # 将新日期添加到列表开头
-        maya_history_dates.insert(0, birth_date_str)
-        # 保持列表长度不超过MAX_MAYA_HISTORY
-        if len(maya_history_dates) > MAX_MAYA_HISTORY:
-            maya_history_dates = maya_history_dates[:MAX_MAYA_HISTORY]
     except ValueError:
         # 如果日期格式无效，不更新历史记录
         print(f"无效的日期格式: {birth_date_str}")
+        return False
+    
+    history_store.record(MAYA_HISTORY_NAMESPACE, client_id, birth_date_str, MAX_MAYA_HISTORY)
+    return True
 
-def get_maya_history():
+def get_maya_history(client_id: str = DEFAULT_CLIENT_ID):
     """获取玛雅历史记录"""
-    return maya_history_dates
+    return history_store.get(MAYA_HISTORY_NAMESPACE, client_id, MAX_MAYA_HISTORY)
 
-def get_maya_birth_info(birth_date_str: str) -> Dict[str, Any]:
-    """
-    获取出生日期的玛雅日历信息
-    包含更详细的个人特质和生命使命解读
-    """
-    try:
-        birth_date = datetime.strptime(birth_date_str, "%Y-%m-%d")
-        # 更新历史记录
-        update_maya_history(birth_date_str)
-    except ValueError as e:
-        print(f"日期格式错误: {e}")
-        return {"error": "出生日期格式无效，请使用YYYY-MM-DD格式"}
-    
-    # 获取基本玛雅日历信息
-    basic_info = generate_maya_info(birth_date)
-    
-    # 计算KIN码
-    kin = calculate_kin_number(birth_date)
-    
-    # 获取印记和音调信息
-    seal_info = get_maya_seal(kin)
-    tone_info = get_maya_tone(kin)
+# 出生图进程内LRU缓存的容量（常见出生日期约4万个）
+MAYA_BIRTH_CACHE_SIZE = 8192
+
+ENERGY_FIELD_NAMES = list(ENERGY_FIELDS.keys())
+
+def _build_maya_birth_chart(birth_date: date) -> Dict[str, Any]:
+    """生成出生图（纯函数，只取决于出生日期）"""
+    ordinal = birth_date.toordinal()
+    kin = calculate_kin_from_ordinal(ordinal)
+    entry = TZOLKIN_TABLE[kin - 1]
+    seal_details = entry.seal_details
+    tone_details = entry.tone_details
     
     # 生成生命使命信息
     life_purpose = {
-        "summary": f"{tone_info['name']}的{seal_info['name']}代表了一种独特的生命能量",
-        "details": f"你的生命使命与{seal_info['details']['特质']}有关",
-        "action_guide": f"通过{tone_info['details']['行动']}的方式来实现你的潜能"
+        "summary": f"{entry.full_name}代表了一种独特的生命能量",
+        "details": f"你的生命使命与{seal_details['特质']}有关",
+        "action_guide": f"通过{tone_details['行动']}的方式来实现你的潜能"
     }
     
     # 生成个人特质信息
+    traits = seal_details['特质'].split('、')
     personal_traits = {
         "strengths": [
-            f"与{seal_info['details']['特质'].split('、')[0]}相关的天赋",
-            f"在{seal_info['details']['能量'].split('、')[0]}方面的能力",
-            f"体现{tone_info['details']['本质']}的能力",
+            f"与{traits[0]}相关的天赋",
+            f"在{seal_details['能量'].split('、')[0]}方面的能力",
+            f"体现{tone_details['本质']}的能力",
             "发现和培养自己独特的才能",
-            f"与{seal_info['details']['特质'].split('、')[1] if '、' in seal_info['details']['特质'] else seal_info['details']['特质']}相关的天赋"
+            f"与{traits[1] if len(traits) > 1 else seal_details['特质']}相关的天赋"
         ],
         "challenges": [
             "平衡内在需求和外在期望",
@@ -545,15 +1222,10 @@ def get_maya_birth_info(birth_date_str: str) -> Dict[str, Any]:
         ]
     }
     
-    # 生成能量场信息
-    # 基于印记和音调选择主要和次要能量场
-    energy_fields = list(ENERGY_FIELDS.keys())
-    
-    # 使用确定性算法选择能量场
-    seed_value = birth_date.toordinal() + kin
-    
-    primary_field = energy_fields[kin % len(energy_fields)]
-    remaining_fields = [f for f in energy_fields if f != primary_field]
+    # 使用确定性算法选择主要和次要能量场
+    seed_value = ordinal + kin
+    primary_field = ENERGY_FIELD_NAMES[kin % len(ENERGY_FIELD_NAMES)]
+    remaining_fields = [f for f in ENERGY_FIELD_NAMES if f != primary_field]
     secondary_field = remaining_fields[(seed_value + 13) % len(remaining_fields)]
     
     birth_energy_field = {
@@ -568,18 +1240,42 @@ def get_maya_birth_info(birth_date_str: str) -> Dict[str, Any]:
         "balance_suggestion": f"平衡{primary_field}和{secondary_field}的能量，发挥你的最大潜能"
     }
     
-    # 构建出生日历信息
-    birth_info = {
-        "date": basic_info["date"],
-        "weekday": basic_info["weekday"],
-        "maya_kin": basic_info["maya_kin"],
-        "maya_seal": basic_info["maya_seal"],
-        "maya_seal_desc": basic_info["maya_seal_desc"],
-        "maya_seal_info": basic_info["maya_seal_info"],
-        "maya_tone_info": basic_info["maya_tone_info"],
+    return {
+        "date": get_date_str(birth_date),
+        "weekday": WEEKDAY_NAMES[birth_date.weekday()],
+        "maya_kin": kin,
+        "maya_seal": entry.seal_name,
+        "maya_seal_desc": entry.full_name,
+        "maya_seal_info": seal_details,
+        "maya_tone_info": tone_details,
+        "maya_oracle": ORACLE_TABLE[kin - 1],
         "life_purpose": life_purpose,
         "personal_traits": personal_traits,
         "birth_energy_field": birth_energy_field
     }
+
+@lru_cache(maxsize=MAYA_BIRTH_CACHE_SIZE)
+def calculate_maya_birth_chart(birth_date_str: str) -> Dict[str, Any]:
+    """
+    获取出生图（进程内LRU缓存）
+    返回的字典为共享的缓存对象，调用方不应修改
+    
+    Args:
+        birth_date_str: 标准YYYY-MM-DD格式的出生日期
+    """
+    return _build_maya_birth_chart(parse_date(birth_date_str))
+
+def get_maya_birth_info(birth_date_str: str, client_id: str = DEFAULT_CLIENT_ID) -> Dict[str, Any]:
+    """
+    获取出生日期的玛雅日历信息
+    包含更详细的个人特质和生命使命解读
+    """
+    try:
+        birth_date = datetime.strptime(birth_date_str, "%Y-%m-%d")
+        # 更新历史记录
+        update_maya_history(birth_date_str, client_id)
+    except ValueError as e:
+        print(f"日期格式错误: {e}")
+        return {"error": "出生日期格式无效，请使用YYYY-MM-DD格式"}
     
-    return birth_info
\ No newline at end of file
+    return calculate_maya_birth_chart(get_date_str(birth_date))
@@ -0,0 +1,19 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""测试公共配置：将backend目录加入导入路径，并提供API测试客户端"""
+
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+@pytest.fixture(scope="session")
+def client(tmp_path_factory):
+    """FastAPI测试客户端，历史记录数据库放在临时目录；依赖不完整时跳过接口测试"""
+    os.environ.setdefault("HISTORY_DB_PATH", str(tmp_path_factory.mktemp("history") / "history.db"))
+    app_module = pytest.importorskip("app")
+    from fastapi.testclient import TestClient
+    return TestClient(app_module.create_app())
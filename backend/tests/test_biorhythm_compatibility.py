@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""群体生物节律兼容度：无效出生日期必须被拒绝"""
+
+import pytest
+
+from services.biorhythm_service import calculate_compatibility_matrix, find_top_compatible
+
+INVALID_BIRTH_DATES = ["", "NaT", "2020", "2020-01-01T12:00", "2020-02-30"]
+
+@pytest.mark.parametrize("invalid", INVALID_BIRTH_DATES)
+def test_matrix_rejects_invalid_birth_date(invalid):
+    with pytest.raises(ValueError):
+        calculate_compatibility_matrix(["1990-01-01", invalid])
+
+@pytest.mark.parametrize("invalid", INVALID_BIRTH_DATES)
+def test_top_k_rejects_invalid_birth_date(invalid):
+    with pytest.raises(ValueError):
+        find_top_compatible(["1990-01-01", "1991-02-03", invalid], 1)
+
+def test_matrix_of_valid_birth_dates():
+    matrix = calculate_compatibility_matrix(["1990-01-01", "1991-02-03"])
+    assert matrix.shape == (2, 2)
+    assert matrix[0, 0] == 100 and matrix[0, 1] == matrix[1, 0]
+
+@pytest.mark.parametrize("body", [
+    {"birth_dates": ["1990-01-01", ""]},
+    {"birth_dates": ["NaT", "NaT"]},
+    {"birth_dates": ["1990-01-01", "2020"], "top_k": 1},
+    {"birth_dates": "1990-01-01"},
+    ["1990-01-01"]
+])
+def test_matrix_endpoint_returns_400_for_invalid_input(client, body):
+    response = client.post("/biorhythm/compatibility/matrix", json=body)
+    assert response.status_code == 400
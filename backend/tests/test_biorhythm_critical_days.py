@@ -0,0 +1,18 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""生物节律临界日：多周期重合类型"""
+
+from services import biorhythm_service
+from services.biorhythm_service import find_critical_days
+
+def test_birth_day_coincides_for_all_cycles():
+    result = find_critical_days("1990-01-01", "1990-01-01", count=1, min_cycles=3)
+    coincidence = result["coincidences"][0]
+    assert coincidence["date"] == "1990-01-01"
+    assert coincidence["type"] == "triple"
+
+def test_more_than_three_cycles_use_fold_type(monkeypatch):
+    cycles = dict(biorhythm_service.CYCLES, intuitive=38)
+    monkeypatch.setattr(biorhythm_service, "CYCLES", cycles)
+    result = find_critical_days("1990-01-01", "1990-01-01", count=1, min_cycles=len(cycles))
+    assert result["coincidences"][0]["type"] == f"{len(cycles)}-fold"
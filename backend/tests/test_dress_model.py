@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""穿衣配置模型：配置哈希只随模型使用的配置项变化"""
+
+import copy
+import json
+
+from services.dress_model import DressConfigModel, config_path
+
+def load_config():
+    with open(config_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def test_unused_section_does_not_change_config_hash():
+    config = load_config()
+    changed = copy.deepcopy(config)
+    changed["weekday_elements"] = list(reversed(changed["weekday_elements"]))
+    assert DressConfigModel(changed).config_hash == DressConfigModel(config).config_hash
+
+def test_model_section_changes_config_hash():
+    config = load_config()
+    changed = copy.deepcopy(config)
+    changed["weekday_names"] = [name + "*" for name in changed["weekday_names"]]
+    assert DressConfigModel(changed).config_hash != DressConfigModel(config).config_hash
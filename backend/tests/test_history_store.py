@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""查询历史存储：并发读写与写入失败重试"""
+
+import sqlite3
+import threading
+
+import pytest
+
+from utils.history_store import HistoryStore
+
+@pytest.fixture
+def store(tmp_path):
+    return HistoryStore(str(tmp_path / "history.db"), flush_interval=60)
+
+def test_get_sees_records_flushed_by_writer(store):
+    for i in range(50):
+        store.record("biorhythm", "a", f"1990-01-{i % 28 + 1:02d}", 100)
+    store.record("biorhythm", "a", "2000-01-01", 100)
+
+    # 后台线程正在写入时读取，必须等待写入完成而不是读到旧数据
+    writer = threading.Thread(target=store.flush)
+    writer.start()
+    assert store.get("biorhythm", "a", 1) == ["2000-01-01"]
+    writer.join()
+
+def test_failed_write_is_requeued(store, monkeypatch):
+    store.record("biorhythm", "a", "1990-01-01", 10)
+    store.record("biorhythm", "a", "1991-02-03", 10)
+
+    write = store._write
+    def failing_write(pending):
+        monkeypatch.setattr(store, "_write", write)
+        raise sqlite3.OperationalError("database is locked")
+    monkeypatch.setattr(store, "_write", failing_write)
+
+    with pytest.raises(sqlite3.OperationalError):
+        store.flush()
+    store.record("biorhythm", "a", "1992-03-04", 10)
+    assert store.get("biorhythm", "a", 10) == ["1992-03-04", "1991-02-03", "1990-01-01"]
+
+def test_history_is_trimmed_to_max_items(store):
+    for value in ["1990-01-01", "1991-02-03", "1992-03-04", "1990-01-01"]:
+        store.record("biorhythm", "a", value, 2)
+    store.record("biorhythm", "b", "2000-01-01", 2)
+    assert store.get("biorhythm", "a", 10) == ["1990-01-01", "1992-03-04"]
+    assert store.get("biorhythm", "b", 10) == ["2000-01-01"]
@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""玛雅群体关系：无效成员日期必须被拒绝"""
+
+import pytest
+
+from services.maya_service import calculate_maya_group_compatibility
+
+INVALID_MEMBER_DATES = ["", "NaT", "2020", "2020-01-01T12:00", "2021-02-29"]
+
+@pytest.mark.parametrize("invalid", INVALID_MEMBER_DATES)
+def test_group_rejects_invalid_member_date(invalid):
+    with pytest.raises(ValueError):
+        calculate_maya_group_compatibility(["1990-01-01", invalid])
+
+def test_group_of_valid_member_dates():
+    result = calculate_maya_group_compatibility(["1990-01-01", "1991-02-03"])
+    assert len(result["members"]) == 2
+
+@pytest.mark.parametrize("invalid", INVALID_MEMBER_DATES)
+def test_group_endpoint_returns_400_for_invalid_member_date(client, invalid):
+    response = client.post("/api/maya/group-compatibility", json={"birth_dates": ["1990-01-01", invalid]})
+    assert response.status_code == 400
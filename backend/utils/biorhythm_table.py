@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+生物节律查找表 - 以"天数 mod 周期"为索引的预计算节律值
+周期均为整数天，因此每个周期只有有限个不同的节律值，无需重复计算三角函数
+同理，两人某周期的同步程度只取决于出生日期差 mod 周期，也可预先计算
+"""
+
+from typing import Dict, List
+import numpy as np
+
+class BiorhythmTable:
+    """生物节律查找表类"""
+
+    def __init__(self, cycles: Dict[str, int]):
+        """
+        初始化查找表
+
+        Args:
+            cycles: 周期名称 -> 周期天数，例如 {"physical": 23}
+        """
+        self.cycles: Dict[str, int] = {}
+        self._arrays: Dict[int, np.ndarray] = {}
+        self._lists: Dict[int, List[int]] = {}
+        self._sync_arrays: Dict[int, np.ndarray] = {}
+        self.rebuild(cycles)
+
+    def _build_period(self, period: int) -> List[int]:
+        """预计算单个周期内每一天的节律值"""
+        # 与 int(100 * np.sin(2 * np.pi * days / cycle)) 的计算和截断方式保持一致
+        values = [int(100 * np.sin(2 * np.pi * k / period)) for k in range(period)]
+        self._arrays[period] = np.array(values, dtype=np.int16)
+        self._lists[period] = values
+        # 相位差为k天时的同步度：100 * |cos(pi * k / period)|，相位相同为100，相差半个周期为0
+        self._sync_arrays[period] = np.array(
+            [round(100 * abs(np.cos(np.pi * k / period))) for k in range(period)], dtype=np.int16
+        )
+        return values
+
+    def rebuild(self, cycles: Dict[str, int]) -> None:
+        """根据周期配置重建查找表"""
+        self.cycles = dict(cycles)
+        self._arrays = {}
+        self._lists = {}
+        self._sync_arrays = {}
+        for period in set(self.cycles.values()):
+            self._build_period(period)
+
+    def ensure(self, cycles: Dict[str, int]) -> 'BiorhythmTable':
+        """周期配置发生变化时自动重建"""
+        if cycles != self.cycles:
+            self.rebuild(cycles)
+        return self
+
+    def lookup(self, cycle: int, days_since_birth: int) -> int:
+        """O(1)查询某个周期在指定天数的节律值"""
+        values = self._lists.get(cycle)
+        if values is None:
+            values = self._build_period(cycle)
+        return values[days_since_birth % cycle]
+
+    def gather(self, days_since_birth) -> Dict[str, np.ndarray]:
+        """
+        向量化查询所有配置周期的节律值
+
+        Args:
+            days_since_birth: 任意形状的整数天数数组
+
+        Returns:
+            dict: 周期名称 -> 与输入同形状的节律值数组（int16）
+        """
+        days = np.asarray(days_since_birth, dtype=np.int64)
+        return {
+            name: self._arrays[period][np.mod(days, period)]
+            for name, period in self.cycles.items()
+        }
+
+    def gather_sync(self, days_apart) -> Dict[str, np.ndarray]:
+        """
+        向量化查询两组出生日期在各周期上的同步度（0-100）
+
+        Args:
+            days_apart: 任意形状的出生日期天数差数组
+
+        Returns:
+            dict: 周期名称 -> 与输入同形状的同步度数组（int16）
+        """
+        days = np.asarray(days_apart, dtype=np.int64)
+        return {
+            name: self._sync_arrays[period][np.mod(days, period)]
+            for name, period in self.cycles.items()
+        }
+
+# 全局共享的查找表实例
+_shared_table = None
+
+def get_biorhythm_table(cycles: Dict[str, int]) -> BiorhythmTable:
+    """获取与当前周期配置一致的共享查找表"""
+    global _shared_table
+    if _shared_table is None:
+        _shared_table = BiorhythmTable(cycles)
+    return _shared_table.ensure(cycles)
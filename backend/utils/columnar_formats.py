@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+列式二进制响应格式 - 直接由NumPy数组生成Arrow IPC、.npy或MessagePack响应
+数值数据以连续缓冲区输出，不逐元素转换为Python对象
+
+列约定：所有列的第一维长度相同（即行数），列可以是二维数组（每行一个定长向量）
+"""
+
+import io
+import json
+from typing import Dict, Optional
+
+import numpy as np
+from fastapi import Request
+from fastapi.responses import Response
+
+# 可选依赖：未安装时对应格式不可用
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+FORMAT_MEDIA_TYPES = {
+    "json": "application/json",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "npy": "application/x-npy",
+    "msgpack": "application/x-msgpack"
+}
+
+METADATA_HEADER = "X-Columnar-Metadata"
+
+def negotiate_format(request: Request, format_param: Optional[str] = None) -> str:
+    """
+    根据format查询参数或Accept头确定响应格式
+
+    Raises:
+        ValueError: 不支持的格式名称
+    """
+    if format_param:
+        fmt = format_param.lower()
+        if fmt not in FORMAT_MEDIA_TYPES:
+            raise ValueError(f"不支持的格式: {format_param}，可选值: {', '.join(FORMAT_MEDIA_TYPES)}")
+        return fmt
+
+    accept = request.headers.get("accept", "")
+    for fmt, media_type in FORMAT_MEDIA_TYPES.items():
+        if fmt != "json" and media_type in accept:
+            return fmt
+    return "json"
+
+def is_format_available(fmt: str) -> bool:
+    """检查格式所需的可选依赖是否已安装"""
+    if fmt == "arrow":
+        return pa is not None
+    if fmt == "msgpack":
+        return msgpack is not None
+    return fmt in FORMAT_MEDIA_TYPES
+
+def _encode_arrow(columns: Dict[str, np.ndarray], metadata: Dict[str, str]) -> bytes:
+    """编码为Arrow IPC流，二维列编码为定长列表"""
+    arrays = []
+    for values in columns.values():
+        if values.ndim == 2:
+            flat = pa.array(np.ascontiguousarray(values).reshape(-1))
+            arrays.append(pa.FixedSizeListArray.from_arrays(flat, values.shape[1]))
+        else:
+            arrays.append(pa.array(values))
+    batch = pa.RecordBatch.from_arrays(arrays, names=list(columns))
+    batch = batch.replace_schema_metadata(metadata)
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    return sink.getvalue().to_pybytes()
+
+def _encode_npy(columns: Dict[str, np.ndarray]) -> bytes:
+    """编码为单个结构化数组的.npy文件，每列一个字段"""
+    rows = len(next(iter(columns.values())))
+    dtype = [(name, values.dtype, values.shape[1:]) for name, values in columns.items()]
+    table = np.empty(rows, dtype=dtype)
+    for name, values in columns.items():
+        table[name] = values
+
+    buffer = io.BytesIO()
+    np.save(buffer, table, allow_pickle=False)
+    return buffer.getvalue()
+
+def _encode_msgpack(columns: Dict[str, np.ndarray], metadata: Dict[str, str]) -> bytes:
+    """编码为MessagePack，每列为dtype、shape和原始字节缓冲区"""
+    payload = {
+        "metadata": metadata,
+        "columns": {
+            name: {
+                "dtype": values.dtype.str,
+                "shape": list(values.shape),
+                "data": np.ascontiguousarray(values).tobytes()
+            }
+            for name, values in columns.items()
+        }
+    }
+    return msgpack.packb(payload, use_bin_type=True)
+
+def columnar_response(columns: Dict[str, np.ndarray], fmt: str,
+                      metadata: Optional[Dict[str, str]] = None) -> Response:
+    """
+    将列式数组编码为指定二进制格式的响应
+
+    Args:
+        columns: 列名 -> NumPy数组
+        fmt: "arrow"、"npy"或"msgpack"
+        metadata: 附加的字符串元数据，同时写入响应头
+    """
+    metadata = metadata or {}
+    if fmt == "arrow":
+        content = _encode_arrow(columns, metadata)
+    elif fmt == "npy":
+        content = _encode_npy(columns)
+    elif fmt == "msgpack":
+        content = _encode_msgpack(columns, metadata)
+    else:
+        raise ValueError(f"不支持的二进制格式: {fmt}")
+
+    headers = {METADATA_HEADER: json.dumps(metadata)} if metadata else None
+    return Response(content=content, media_type=FORMAT_MEDIA_TYPES[fmt], headers=headers)
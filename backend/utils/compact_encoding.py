@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+紧凑响应编码 - "字典 + 引用"模式
+范围响应中逐日重复的静态对象（配置中的详细说明、固定文本等）只在字典中出现一次，
+每天的记录以整数ID引用字典中的对象，响应体积和序列化开销都随之减少
+"""
+
+from typing import Any, Callable, Dict, Hashable, List
+
+class ReferenceTable:
+    """按类别收集不重复的对象并分配从0开始的ID"""
+
+    def __init__(self):
+        self.tables: Dict[str, List[Any]] = {}
+        self._ids: Dict[str, Dict[Hashable, int]] = {}
+
+    def ref(self, kind: str, key: Hashable, value: Any) -> int:
+        """
+        返回对象的引用ID，首次出现时加入字典
+
+        Args:
+            kind: 字典类别，通常为字段名
+            key: 判断对象是否相同的可哈希键
+            value: 对象本身
+        """
+        ids = self._ids.setdefault(kind, {})
+        ref_id = ids.get(key)
+        if ref_id is None:
+            ref_id = len(ids)
+            ids[key] = ref_id
+            self.tables.setdefault(kind, []).append(value)
+        return ref_id
+
+def compact_records(records: List[Dict[str, Any]], key_functions: Dict[str, Callable[[Any], Hashable]],
+                    table: ReferenceTable = None) -> List[Dict[str, Any]]:
+    """
+    将记录中指定字段的值替换为字典引用ID（值为None时保持None）
+
+    Args:
+        records: 逐日记录列表（不会被修改）
+        key_functions: 字段名 -> 从字段值计算去重键的函数
+        table: 引用表，默认新建；字典内容见table.tables
+
+    Returns:
+        list: 替换后的新记录列表
+    """
+    table = table if table is not None else ReferenceTable()
+    compacted = []
+    for record in records:
+        item = dict(record)
+        for field, key_function in key_functions.items():
+            value = item.get(field)
+            if value is not None:
+                item[field] = table.ref(field, key_function(value), value)
+        compacted.append(item)
+    return compacted
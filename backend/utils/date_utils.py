@@ -1,4 +1,5 @@
 import datetime
+import numpy as np
 
 def get_date_str(date_obj=None):
     """获取日期字符串，格式为YYYY-MM-DD"""
@@ -46,4 +47,42 @@ def get_date_range(current_date, days_before, days_after):
     """获取日期范围"""
     start_date = current_date - datetime.timedelta(days=days_before)
     end_date = current_date + datetime.timedelta(days=days_after)
-    return start_date, end_date
\ No newline at end of file
+    return start_date, end_date
+
+def parse_date_array(date_list) -> np.ndarray:
+    """
+    将日期列表转换为datetime64[D]数组
+    元素须为YYYY-MM-DD字符串或date对象，也可以直接传入datetime64数组
+
+    Raises:
+        ValueError: 存在空字符串、"NaT"、不完整日期（如"2020"）或带时间的日期等无效元素
+    """
+    if isinstance(date_list, np.ndarray) and np.issubdtype(date_list.dtype, np.datetime64):
+        dates = date_list.astype('datetime64[D]')
+        if np.isnat(dates).any():
+            raise ValueError("日期数组中包含无效日期(NaT)")
+        return dates
+    
+    values = list(date_list)
+    if all(isinstance(d, str) for d in values):
+        try:
+            # 标准YYYY-MM-DD字符串可由NumPy直接批量解析
+            dates = np.array(values, dtype='datetime64[D]')
+        except ValueError:
+            dates = None
+        if dates is not None:
+            # NumPy会接受""、"NaT"、"2020"并截断带时间的字符串，通过逐元素回写比对确保是严格的YYYY-MM-DD
+            invalid = np.isnat(dates) | (np.datetime_as_string(dates, unit='D') != np.array(values, dtype=str))
+            if not invalid.any():
+                return dates
+            raise ValueError(f"无效的日期: {values[int(np.argmax(invalid))]!r}，请使用YYYY-MM-DD格式")
+
+    parsed = []
+    for d in values:
+        if not isinstance(d, (str, datetime.date)):
+            raise ValueError(f"无法解析日期: {d!r}")
+        try:
+            parsed.append(parse_date(d))
+        except ValueError:
+            raise ValueError(f"无效的日期: {d!r}，请使用YYYY-MM-DD格式")
+    return np.array(parsed, dtype='datetime64[D]')
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+确定性工具 - 跨进程、跨机器稳定的哈希
+Python内置的hash()对字符串启用了随机化（PYTHONHASHSEED），每个进程结果不同，
+不能用于生成需要在多个worker或重启后保持一致的数据
+"""
+
+import zlib
+
+import numpy as np
+
+def stable_hash(text: str) -> int:
+    """
+    稳定的字符串哈希：UTF-8编码后的CRC-32（0 ~ 2**32-1的无符号整数）
+    同一字符串在任何进程、任何机器上结果相同
+    """
+    return zlib.crc32(text.encode('utf-8'))
+
+UINT64_MASK = (1 << 64) - 1
+SPLITMIX64_GAMMA = 0x9E3779B97F4A7C15
+
+def splitmix64(value: int) -> int:
+    """SplitMix64混合函数：将64位整数均匀打散为另一个64位整数"""
+    z = (value + SPLITMIX64_GAMMA) & UINT64_MASK
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & UINT64_MASK
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & UINT64_MASK
+    return z ^ (z >> 31)
+
+def splitmix64_array(values: np.ndarray) -> np.ndarray:
+    """splitmix64的向量化版本（uint64数组，乘法按2**64自然回绕）"""
+    z = np.asarray(values, dtype=np.uint64) + np.uint64(SPLITMIX64_GAMMA)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+def counter_keys(*parts) -> np.ndarray:
+    """
+    CounterRNG键的向量化版本，各部分可以是整数数组、整数或字符串（按广播规则组合）
+    """
+    key = np.zeros((), dtype=np.uint64)
+    for part in parts:
+        if isinstance(part, str):
+            part = stable_hash(part)
+        if isinstance(part, int):
+            part = np.uint64(part & UINT64_MASK)
+        else:
+            part = np.asarray(part, dtype=np.int64).astype(np.uint64)
+        key = splitmix64_array(key ^ part)
+    return key
+
+def counter_draws(keys: np.ndarray, count: int) -> np.ndarray:
+    """
+    对每个键取前count个值，结果在最后一维，等价于对每个键依次调用CounterRNG.next_u64()
+
+    Returns:
+        np.ndarray: 形状为keys.shape + (count,)的uint64数组
+    """
+    steps = np.arange(1, count + 1, dtype=np.uint64) * np.uint64(SPLITMIX64_GAMMA)
+    return splitmix64_array(np.asarray(keys, dtype=np.uint64)[..., np.newaxis] + steps)
+
+def draws_to_unit(draws: np.ndarray) -> np.ndarray:
+    """将uint64取值转换为[0, 1)浮点数，与CounterRNG.random()一致"""
+    return (draws >> np.uint64(11)).astype(np.float64) * (1.0 / (1 << 53))
+
+class CounterRNG:
+    """
+    基于计数器的随机数生成器
+    第n次取值只由(键, n)决定：splitmix64(键 + n * GAMMA)，没有共享的全局状态，
+    可在多线程中使用，且任何进程、任何机器上的结果相同
+    """
+
+    __slots__ = ("key", "counter")
+
+    def __init__(self, *parts):
+        """
+        Args:
+            parts: 组成键的整数或字符串（字符串使用stable_hash）
+        """
+        key = 0
+        for part in parts:
+            if isinstance(part, str):
+                part = stable_hash(part)
+            key = splitmix64(key ^ (part & UINT64_MASK))
+        self.key = key
+        self.counter = 0
+
+    def next_u64(self) -> int:
+        """下一个64位无符号整数"""
+        self.counter += 1
+        return splitmix64((self.key + self.counter * SPLITMIX64_GAMMA) & UINT64_MASK)
+
+    def random(self) -> float:
+        """下一个[0, 1)区间的浮点数（53位精度）"""
+        return (self.next_u64() >> 11) * (1.0 / (1 << 53))
+
+    def randbelow(self, n: int) -> int:
+        """下一个[0, n)区间的整数"""
+        return self.next_u64() % n
+
+    def choice(self, seq):
+        """从非空序列中选择一个元素"""
+        return seq[self.randbelow(len(seq))]
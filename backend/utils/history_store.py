@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+查询历史存储 - 基于SQLite（WAL模式）的按客户端持久化历史记录
+每个（命名空间, 客户端）保留最近使用的若干条记录（LRU语义）
+写入先进入内存队列，由后台线程批量提交，不阻塞请求处理
+多个worker进程共享同一个数据库文件
+读取（get）会先提交本进程的待写入记录并访问SQLite，属于阻塞I/O，应在线程池中调用
+客户端标识由调用方提供且未经认证，历史记录按标识隔离只是区分用途，不是访问控制
+"""
+
+import atexit
+import os
+import sqlite3
+import threading
+import time
+from typing import List, Optional, Tuple
+
+DEFAULT_CLIENT_ID = "default"
+
+class HistoryStore:
+    """查询历史存储类"""
+
+    def __init__(self, db_path: str, flush_interval: float = 0.5, batch_size: int = 200):
+        """
+        初始化历史存储
+
+        Args:
+            db_path: SQLite数据库文件路径
+            flush_interval: 后台批量写入的间隔（秒）
+            batch_size: 待写入记录达到该数量时立即写入
+        """
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+
+        self._conn: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._pending: List[Tuple[str, str, str, int, int]] = []
+        self._pending_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._writer: Optional[threading.Thread] = None
+        self._last_timestamp = 0
+        atexit.register(self.flush)
+
+    def _connection(self) -> sqlite3.Connection:
+        """延迟创建数据库连接并初始化表结构（需持有_db_lock）"""
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=10, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS history (
+                    namespace TEXT NOT NULL,
+                    client_id TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    updated_at INTEGER NOT NULL,
+                    PRIMARY KEY (namespace, client_id, value)
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_history_recent "
+                "ON history (namespace, client_id, updated_at DESC)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _start_writer(self) -> None:
+        """启动后台写入线程"""
+        if self._writer is None or not self._writer.is_alive():
+            self._writer = threading.Thread(target=self._run, name="HistoryStoreWriter", daemon=True)
+            self._writer.start()
+
+    def _run(self) -> None:
+        """后台线程：定期或在队列满时批量写入"""
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except sqlite3.Error as e:
+                print(f"历史记录写入失败: {e}")
+
+    def record(self, namespace: str, client_id: str, value: str, max_items: int) -> None:
+        """
+        记录一次查询（异步批量写入）
+
+        Args:
+            namespace: 历史记录类别，例如"biorhythm"
+            client_id: 客户端标识
+            value: 查询值，例如出生日期
+            max_items: 该客户端在此类别下保留的最大记录数
+        """
+        with self._pending_lock:
+            # 保证同一进程内的时间戳严格递增，确保最近使用顺序稳定
+            timestamp = max(time.time_ns(), self._last_timestamp + 1)
+            self._last_timestamp = timestamp
+            self._pending.append((namespace, client_id, value, max_items, timestamp))
+            pending_count = len(self._pending)
+
+        self._start_writer()
+        if pending_count >= self.batch_size:
+            self._wakeup.set()
+
+    def flush(self) -> None:
+        """
+        将队列中的记录在一个事务内写入数据库，并裁剪超出上限的旧记录
+        取出队列到事务提交全程持有_db_lock，并发的get()会等待进行中的写入完成；
+        写入失败时记录放回队列头部，由下一次flush重试
+        """
+        with self._db_lock:
+            with self._pending_lock:
+                pending, self._pending = self._pending, []
+            if not pending:
+                return
+            try:
+                self._write(pending)
+            except sqlite3.Error:
+                with self._pending_lock:
+                    self._pending[:0] = pending
+                raise
+
+    def _write(self, pending: List[Tuple[str, str, str, int, int]]) -> None:
+        """在一个事务内写入记录并裁剪旧记录（需持有_db_lock）"""
+        conn = self._connection()
+        with conn:
+            conn.executemany(
+                """
+                INSERT INTO history (namespace, client_id, value, updated_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (namespace, client_id, value)
+                DO UPDATE SET updated_at = MAX(updated_at, excluded.updated_at)
+                """,
+                [(ns, client_id, value, ts) for ns, client_id, value, _, ts in pending]
+            )
+            limits = {(ns, client_id): max_items for ns, client_id, _, max_items, _ in pending}
+            for (ns, client_id), max_items in limits.items():
+                conn.execute(
+                    """
+                    DELETE FROM history
+                    WHERE namespace = ? AND client_id = ? AND value NOT IN (
+                        SELECT value FROM history
+                        WHERE namespace = ? AND client_id = ?
+                        ORDER BY updated_at DESC LIMIT ?
+                    )
+                    """,
+                    (ns, client_id, ns, client_id, max_items)
+                )
+
+    def get(self, namespace: str, client_id: str, limit: int) -> List[str]:
+        """获取客户端最近的查询记录（最近使用的在前，阻塞调用）"""
+        # 先提交本进程尚未写入的记录，保证读到自己的写入
+        self.flush()
+        with self._db_lock:
+            rows = self._connection().execute(
+                """
+                SELECT value FROM history
+                WHERE namespace = ? AND client_id = ?
+                ORDER BY updated_at DESC LIMIT ?
+                """,
+                (namespace, client_id, limit)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+# 全局历史存储实例
+history_store = HistoryStore(
+    os.getenv(
+        "HISTORY_DB_PATH",
+        os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "history.db")
+    )
+)
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+干支纪日 - 由日期序数直接得到日柱（天干、地支、纳音）
+日柱以六十甲子循环，每天前进一位，参考点为2000-01-01（戊午日，甲子为0时序号54）
+提供单日O(1)查询和对datetime64[D]数组的向量化计算
+"""
+
+import datetime
+from typing import Dict, NamedTuple
+
+import numpy as np
+
+HEAVENLY_STEMS = ["甲", "乙", "丙", "丁", "戊", "己", "庚", "辛", "壬", "癸"]
+EARTHLY_BRANCHES = ["子", "丑", "寅", "卯", "辰", "巳", "午", "未", "申", "酉", "戌", "亥"]
+STEM_ELEMENTS = ["木", "木", "火", "火", "土", "土", "金", "金", "水", "水"]
+BRANCH_ELEMENTS = ["水", "土", "木", "木", "土", "火", "火", "土", "金", "金", "土", "水"]
+BRANCH_ZODIACS = ["鼠", "牛", "虎", "兔", "龙", "蛇", "马", "羊", "猴", "鸡", "狗", "猪"]
+
+# 六十甲子纳音，每两个干支共用一个（下标为干支序号 // 2），最后一个字为纳音五行
+NAYIN_NAMES = [
+    "海中金", "炉中火", "大林木", "路旁土", "剑锋金", "山头火",
+    "涧下水", "城头土", "白蜡金", "杨柳木", "泉中水", "屋上土",
+    "霹雳火", "松柏木", "长流水", "沙中金", "山下火", "平地木",
+    "壁上土", "金箔金", "覆灯火", "天河水", "大驿土", "钗钏金",
+    "桑柘木", "大溪水", "沙中土", "天上火", "石榴木", "大海水"
+]
+
+SEXAGENARY_CYCLE = 60
+# 参考日：2000-01-01为戊午日
+SEXAGENARY_REFERENCE_ORDINAL = datetime.date(2000, 1, 1).toordinal()
+SEXAGENARY_REFERENCE_INDEX = 54
+
+EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+class DayPillar(NamedTuple):
+    """日柱（index为六十甲子序号，甲子为0）"""
+    index: int
+    name: str
+    stem: str
+    branch: str
+    stem_element: str
+    branch_element: str
+    nayin: str
+    nayin_element: str
+    zodiac: str
+
+def _build_day_pillar(index: int) -> DayPillar:
+    stem = index % 10
+    branch = index % 12
+    nayin = NAYIN_NAMES[index // 2]
+    return DayPillar(
+        index=index,
+        name=HEAVENLY_STEMS[stem] + EARTHLY_BRANCHES[branch],
+        stem=HEAVENLY_STEMS[stem],
+        branch=EARTHLY_BRANCHES[branch],
+        stem_element=STEM_ELEMENTS[stem],
+        branch_element=BRANCH_ELEMENTS[branch],
+        nayin=nayin,
+        nayin_element=nayin[-1],
+        zodiac=BRANCH_ZODIACS[branch]
+    )
+
+# 六十甲子表
+DAY_PILLAR_TABLE = tuple(_build_day_pillar(index) for index in range(SEXAGENARY_CYCLE))
+
+def day_pillar_index(ordinals):
+    """
+    由日期序数（date.toordinal()）计算日柱序号，支持整数和NumPy数组
+    """
+    return (ordinals - SEXAGENARY_REFERENCE_ORDINAL + SEXAGENARY_REFERENCE_INDEX) % SEXAGENARY_CYCLE
+
+def get_day_pillar(date: datetime.date) -> DayPillar:
+    """获取某天的日柱"""
+    return DAY_PILLAR_TABLE[day_pillar_index(date.toordinal())]
+
+def day_pillar_arrays(dates: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    向量化计算日期数组的日柱
+
+    Args:
+        dates: datetime64[D]数组
+
+    Returns:
+        dict: 日柱序号、天干下标、地支下标、纳音下标
+    """
+    indexes = day_pillar_index(np.asarray(dates, dtype='datetime64[D]').astype(np.int64) + EPOCH_ORDINAL)
+    return {
+        "index": indexes,
+        "stem": indexes % 10,
+        "branch": indexes % 12,
+        "nayin": indexes // 2
+    }
@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流式响应工具 - 以NDJSON（每行一个JSON对象）分块输出长日期范围的数据
+数据由生成器按块产生，内存占用与窗口长度无关
+"""
+
+import json
+from typing import Any, Dict, Iterable, Iterator, List
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+def wants_ndjson(request: Request, stream: bool = False) -> bool:
+    """判断客户端是否请求流式响应（查询参数或Accept头）"""
+    return stream or NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+def iter_ndjson(chunks: Iterable[List[Dict[str, Any]]]) -> Iterator[str]:
+    """将记录块序列化为NDJSON文本，每块输出一次"""
+    for records in chunks:
+        yield "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+
+def ndjson_response(chunks: Iterable[List[Dict[str, Any]]]) -> StreamingResponse:
+    """创建NDJSON流式响应"""
+    return StreamingResponse(iter_ndjson(chunks), media_type=NDJSON_MEDIA_TYPE)